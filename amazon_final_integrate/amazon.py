@@ -1,18 +1,33 @@
-import os, csv
-import re, camelot
-import PyPDF2
+import os, sys, csv
+import re, time
 import fitz  # PyMuPDF
-from pdf2image import convert_from_path
-import pytesseract
 import warnings
-from datetime import datetime
-import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from surya.manifest import build_order_index, manifest_rows, stream_export
+from surya.camelot_batch import CamelotBatch
+from surya.runlog import RunLog
+from surya.writer import OrderPdfWriter
+from surya.sink import DirectorySink
+from surya.records import OrderRecord
+from surya.label_index import LABEL_INDEX, index_orders
+from surya.pipeline import run_split
+from surya.ocr import OcrPool, page_text
+from surya.fingerprint import FingerprintStore
+from surya.stats import RunStats, timed, stage
+
+# Where the AWB and order-id blocks sit on the image-only shipping label, as page fractions (x0, y0, x1, y1)
+LABEL_REGIONS = {
+    "awb": (0.05, 0.17, 0.65, 0.215),
+    "orderid": (0.05, 0.37, 0.55, 0.45),
+}
 
 ##made
-def extract_table_with_camelot(pdf_path, page_number):
+@timed("camelot")
+def extract_table_with_camelot(camelot_batch, page_number):
     """ Try extracting table using Camelot (works for structured PDFs). """
-    tables = camelot.read_pdf(pdf_path, pages=str(page_number))
-    if tables.n > 0:
+    tables = camelot_batch.tables(page_number)
+    if len(tables) > 0:
         df = tables[0].df  # Convert to DataFrame
         df.columns = df.iloc[0] # Set first row as header
         df = df[1:].reset_index(drop=True) # Remove first row
@@ -55,6 +70,13 @@ def extract_order_details(text, second_page_flag= False):
       first_page_match = re.search(r"Ship to:|Ship From:", text, re.IGNORECASE) 
     return orderid, number_or_id, bool(first_page_match)
   
+def format_order_id(orderid):
+    """Normalize a parsed order id to Amazon's 3-7-7 form, e.g. 408-9366176-5129111."""
+    if not orderid:
+      return orderid
+    orderid = orderid.replace("-","")
+    return f"{orderid[:3]}-{orderid[3:10]}-{orderid[10:]}"
+  
 def clean_text(text):
     """Clean text by removing extra spaces, newlines, etc."""
     text = re.sub(r'[^\x00-\x7F]+', ' ', text)  # Remove non-ASCII characters
@@ -62,118 +84,182 @@ def clean_text(text):
     text = text.replace("—", "-")  # Replace OCR misrecognized dashes
     return text
 
-def extract_text_from_page(page, ocr=False):
+@timed("fitz")
+def extract_text_from_page(page, ocr_pool=None):
     """Extract text using PyMuPDF or OCR if necessary."""
-    text = page.get_text("text")
-    if not text.strip() and ocr:
-        # Convert page to image and apply OCR
-        pix = page.get_pixmap()
-        image = convert_from_path(pdf_path, first_page=page.number+1, last_page=page.number+1)[0]
-        custom_config = r'--oem 3 --psm 6'
-        text = pytesseract.image_to_string(image, config = custom_config)
-    return clean_text(text)
-
-def split_pdf_by_orderid(pdf_path, output_folder, final_output_dict):
-    """Splits a PDF into separate PDFs based on OrderID."""
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
+    return clean_text(page_text(page, ocr_pool))
+
+def split_pdf_by_orderid(pdf_path, output_folder, final_output_dict, ocr_pool=None, roi_ocr=True, incremental=True, profile=False, sink=None, exporter=None, label_index=LABEL_INDEX):
+    """
+    Splits a PDF into separate PDFs based on OrderID.
+    :param ocr_pool: OcrPool for image-only pages (default: a pool owned by this run)
+    :param roi_ocr: OCR only the LABEL_REGIONS of image-only pages, falling back to the full page when no AWB is read
+    :param incremental: Reuse OCR and camelot results of unchanged pages and keep orders whose pages and manifest rows did not change
+    :param profile: Also write a cProfile dump next to the run report (logs/profile_amazon.prof)
+    :param sink: Output sink from surya.sink (default: loose files in output_folder); archive sinks always write every order
+    :param exporter: Optional OrderExporter receiving each order once it is final
+    :param label_index: SQLite label index (LabelIndex) the written orders are added to at the end, None to skip
+    """
+    stats = RunStats("amazon", profile=profile).start()
+    sink = sink or DirectorySink(output_folder)
+    incremental = incremental and sink.reusable
     
     order_pages = {}
     doc = fitz.open(pdf_path)
     skip_page_for_now = []
     prev_order_id= ""
     order_details = {}
-    
-    for i, page in enumerate(doc):
-        text = extract_text_from_page(page)
-        if not text:
-          text_ocr = extract_text_from_page(page, ocr=True)
-          awb = re.search(r"AWB (\w+)", text_ocr)
-          if awb:
-            awb_value = awb.group(1)
-        #if first page text is empty which is always empty go find order id on the next page or skip that page for now with detals of the page in 
-        if text:
-            orderid, number_or_id, first_page_match = extract_order_details(text)
-            if orderid:
-                orderid = orderid.replace("-","")
-                orderid = f"{orderid[:3]}-{orderid[3:10]}-{orderid[10:]}"
-                order_details = {orderid: [{"sku": d["sku"], "Qty": d["quantity-purchased"], "AWB": d["tracking-id"]} for d in final_output_dict if d["order-id"] == orderid]}
-                #second preference grabbing order details from camelot
-                if not order_details[orderid]:
-                    order_details[orderid] = extract_table_with_camelot(pdf_path, i+1)
-                    for j in order_details[orderid]:
-                      j["AWB"] = awb_value
-                if orderid not in order_pages and not skip_page_for_now:
-                    order_pages[orderid] = []
-                elif orderid not in order_pages and skip_page_for_now:
-                    #check if order_details is appended in orderpages for that id.
-                    order_pages[orderid] = skip_page_for_now
-                    order_pages[orderid].append(order_details[orderid])
-                    order_details = {}
-                order_pages[orderid].append(i)
-                skip_page_for_now = []
-                prev_order_id = orderid
-            elif number_or_id and number_or_id != "Number":
-                skip_page_for_now = [i]
-            elif first_page_match:
-                skip_page_for_now = [i]
+    manifest_index = build_order_index(final_output_dict, "order-id")
+    log = RunLog("amazon")
+    try:
+        fingerprints = FingerprintStore(output_folder, doc, manifest_index, {"roi_ocr": roi_ocr}) if incremental else None
+        writer = OrderPdfWriter(doc, output_folder, log, fingerprints, sink, exporter)
+        open_order = None  # last order started; written out as soon as the next one begins
+        own_ocr_pool = ocr_pool is None
+        ocr_pool = ocr_pool or OcrPool()
+
+        # Phase 1: text pass over every page; order pages missing from the manifest get their tables in batched camelot calls
+        texts = [extract_text_from_page(page) for page in doc]
+        image_pages = [i for i, text in enumerate(texts) if not text]  # OCR'd concurrently as one batch
+        ocr_texts = {}
+        pending = []  # image pages whose OCR text is not known from an earlier run
+        for i in image_pages:
+            cached = fingerprints.cached(i, "ocr") if fingerprints else None
+            if cached is None:
+                pending.append(i)
             else:
-                order_pages[prev_order_id].append(i)
-                prev_order_id = ""
-        else:
-          skip_page_for_now = [i]
-        if order_details and not skip_page_for_now:
-            if orderid:
-                order_pages[orderid].append(order_details[orderid])
-                order_details = {}
+                ocr_texts[i] = cached
+        if roi_ocr:
+            for i, regions in zip(pending, ocr_pool.ocr_regions([doc[i] for i in pending], LABEL_REGIONS)):
+                ocr_texts[i] = clean_text(" ".join(regions.values()))
+        full_page_ocr = [i for i in pending if not re.search(r"AWB (\w+)", ocr_texts.get(i, ""))]
+        ocr_texts.update(zip(full_page_ocr, map(clean_text, ocr_pool.ocr_pages([doc[i] for i in full_page_ocr]))))
+        for i in pending if fingerprints else []:
+            fingerprints.store(i, "ocr", ocr_texts[i])
+        camelot_pages = []
+        for i, text in enumerate(texts):
+            orderid = format_order_id(extract_order_details(text)[0]) if text else None
+            if orderid and orderid not in manifest_index and not (fingerprints and fingerprints.cached(i, "camelot") is not None):
+                camelot_pages.append(i+1)
+        camelot_batch = CamelotBatch(pdf_path)
+        camelot_batch.prefetch(camelot_pages)
+    
+        for i, page in enumerate(doc):
+            page_started = time.perf_counter()
+            text = texts[i]
+            path_used = "continuation"
+            page_awb = None
+            if not text:
+              path_used = "ocr"
+              text_ocr = ocr_texts[i]
+              awb = re.search(r"AWB (\w+)", text_ocr)
+              if awb:
+                awb_value = awb.group(1)
+                page_awb = awb_value
+            #if first page text is empty which is always empty go find order id on the next page or skip that page for now with detals of the page in 
+            if text:
+                orderid, number_or_id, first_page_match = extract_order_details(text)
+                if orderid:
+                    orderid = format_order_id(orderid)
+                    with stage("manifest"):
+                        order_details = {orderid: [{"sku": d["sku"], "Qty": d["quantity-purchased"], "AWB": d["tracking-id"]} for d in manifest_index.get(orderid, [])]}
+                    path_used = "manifest"
+                    #second preference grabbing order details from camelot
+                    if not order_details[orderid]:
+                        path_used = "camelot"
+                        if fingerprints:
+                            order_details[orderid] = fingerprints.cached_call(i, "camelot", lambda: extract_table_with_camelot(camelot_batch, i+1))
+                        else:
+                            order_details[orderid] = extract_table_with_camelot(camelot_batch, i+1)
+                        for j in order_details[orderid]:
+                          j["AWB"] = awb_value
+                    page_awb = order_details[orderid][0]["AWB"] if order_details[orderid] else None
+                    if orderid not in order_pages:
+                        if open_order:
+                            writer.emit(order_pages[open_order])
+                        open_order = orderid
+                    if orderid not in order_pages and not skip_page_for_now:
+                        order_pages[orderid] = OrderRecord(orderid)
+                    elif orderid not in order_pages and skip_page_for_now:
+                        #check if order_details is appended in orderpages for that id.
+                        order_pages[orderid] = OrderRecord(orderid, pages=skip_page_for_now, items=order_details[orderid])
+                        order_details = {}
+                    order_pages[orderid].pages.append(i)
+                    skip_page_for_now = []
+                    prev_order_id = orderid
+                elif number_or_id and number_or_id != "Number":
+                    path_used = "skipped"
+                    skip_page_for_now = [i]
+                elif first_page_match:
+                    path_used = "skipped"
+                    skip_page_for_now = [i]
+                else:
+                    order_pages[prev_order_id].pages.append(i)
+                    prev_order_id = ""
             else:
-                order_pages[prev_order_id].append(order_details[orderid])
-                order_details = {}
-        with open("logs/logfile_amazon.txt", "a+", encoding="utf-8") as log_file:
-          log_file.write(f"{i+1} page completed.\n")
-          log_file.write(f"found {orderid} in {i+1} page with {order_details}\n" if not skip_page_for_now else f"skipping page {i}\n")
+              skip_page_for_now = [i]
+            if order_details and not skip_page_for_now:
+                if orderid:
+                    order_pages[orderid].add_items(order_details[orderid])
+                    order_details = {}
+                else:
+                    order_pages[prev_order_id].add_items(order_details[orderid])
+                    order_details = {}
+            log.write(f"{i+1} page completed.\n")
+            log.write(f"found {orderid} in {i+1} page with {order_details}\n" if not skip_page_for_now else f"skipping page {i}\n")
+            log.record(page=i, order_id=orderid if text else None, awb=page_awb, path=path_used, duration=round(time.perf_counter() - page_started, 4))
     
-    # Create PDFs for each OrderID
-    with open(pdf_path, "rb") as infile:
-        reader = PyPDF2.PdfReader(infile)
-        
-        for orderid, pages in order_pages.items():
-            writer = PyPDF2.PdfWriter()
-            for page_num in pages:
-                if isinstance(page_num, int):
-                  writer.add_page(reader.pages[page_num])
-            
-            output_pdf_path = os.path.join(output_folder, f"Order_{orderid}.pdf")
-            order_pages[orderid].append({"output_pdf_location" : output_pdf_path})
-            with open(output_pdf_path, "wb") as output_pdf:
-                writer.write(output_pdf)
-            with open("logs/logfile_amazon.txt", "a+", encoding="utf-8") as log_file:
-              log_file.write(f"Saved: {output_pdf_path}\n")
+        # Write the orders still open, plus any that gained pages after they were emitted
+        writer.finish(order_pages)
+        if fingerprints:
+            fingerprints.save()
+        if own_ocr_pool:
+            ocr_pool.close()
+    finally:
+        log.close()
+    if label_index:
+        index_orders(label_index, "amazon", order_pages, pdf_path)
+    stats.finish()
     return order_pages
 
-def txt_to_dataframe(file_path):
+REQUIRED_COLUMNS = ["order-id", "sku", "quantity-purchased", "tracking-id"]
+MANIFEST_DTYPES = {"order-id": str, "sku": str, "tracking-id": str}
+STREAM_ABOVE_BYTES = 64 << 20  # order reports larger than this are streamed instead of loaded whole
+
+def load_manifest(file_path):
+    """Order export (.txt) rows with only REQUIRED_COLUMNS, read through the columnar manifest cache."""
+    return manifest_rows(file_path, REQUIRED_COLUMNS, MANIFEST_DTYPES)
+
+
+def label_order_ids(pdf_path):
+    """Order ids on the text pages of a label PDF, the only ones split_pdf_by_orderid looks up in the order report."""
+    with fitz.open(pdf_path) as doc:
+        return {format_order_id(orderid) for page in doc if (orderid := extract_order_details(clean_text(page.get_text("text")))[0])}
+
+def stream_manifest(file_path, order_ids=None, chunksize=100_000):
     """
-    Reads a tab-delimited .txt file and converts it to a Pandas DataFrame.
-    :param file_path: Path to the .txt file
-    :return: Pandas DataFrame
+    Stream a (months-long) order report chunk by chunk instead of loading it, for build_order_index to consume.
+    :param order_ids: Keep only these orders' rows, e.g. label_order_ids(pdf_path)
     """
-    df = pd.read_csv(file_path, delimiter='\t')
-    return df
+    return stream_export(file_path, REQUIRED_COLUMNS, MANIFEST_DTYPES, chunksize, only=("order-id", order_ids) if order_ids is not None else None)
 
-def grab_required_fields(data):
-    required_columns = ["order-id", "sku", "quantity-purchased", "tracking-id"]  # Replace with actual column names
-    filtered_data = [{col: row[col] for col in required_columns if col in row} for row in data]
-    return filtered_data
+
+def run(pdf_path, file_path, output_folder, ocr_pool=None, profile=False, stream=None, **outputs):
+    """
+    Split one Amazon label PDF using its order report (tab-delimited .txt), starting a fresh run log.
+    :param stream: Stream the report keeping only this PDF's orders (default: when it is larger than STREAM_ABOVE_BYTES)
+    :param outputs: pick_batches, archive, export and label_index, see surya.pipeline.run_split
+    """
+    if stream is None:
+        stream = os.path.getsize(file_path) > STREAM_ABOVE_BYTES
+    final_output_dict = stream_manifest(file_path, label_order_ids(pdf_path)) if stream else load_manifest(file_path)
+    warnings.filterwarnings("ignore", category=UserWarning, module="camelot.parsers.base")
+    return run_split("amazon", split_pdf_by_orderid, pdf_path, output_folder, final_output_dict, ocr_pool=ocr_pool, profile=profile, **outputs)
 
 
 if __name__ == "__main__":
     file_path = "amazon_final_integrate/amazon.txt"  # Replace with the actual file path
-    df = txt_to_dataframe(file_path)
-    final_output_dict = grab_required_fields(df.to_dict(orient="records"))
     # Example usage
-    warnings.filterwarnings("ignore", category=UserWarning, module="camelot.parsers.base")
     pdf_path = "amazon_final_integrate/amazon.pdf"  # Replace with your PDF file path
     output_folder = "outputs/amazon_output_pdfs"  # Folder to save separated PDFs
-    with open("logs/logfile_amazon.txt", "w+", encoding="utf-8") as log_file:
-      log_file.write(f"Starting the log for mentioned time:{datetime.today().strftime("%Y-%m-%d %H:%M:%S")}\n")
-    op = split_pdf_by_orderid(pdf_path, output_folder, final_output_dict)
\ No newline at end of file
+    op = run(pdf_path, file_path, output_folder)
\ No newline at end of file
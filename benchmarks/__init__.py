@@ -0,0 +1 @@
+"""Synthetic label PDFs and throughput benchmarks for the marketplace splitters."""
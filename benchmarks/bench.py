@@ -0,0 +1,126 @@
+import os, sys, json, time, argparse, resource, subprocess, tempfile
+from collections import defaultdict
+import fitz  # PyMuPDF
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.synthetic import make_labels, MANIFEST_EXTENSIONS
+
+# Marketplace -> split function and the options it is benchmarked with (fresh output, no reuse)
+CASES = {
+    "amazon": {"split": "split_pdf_by_orderid", "options": {"incremental": False}},
+    "flipkart": {"split": "split_pdf_custom", "options": {"top_ratio": 0.46, "resume": False, "incremental": False}},
+    "meesho": {"split": "split_pdf_custom", "options": {"top_ratio": 0.345, "resume": False, "incremental": False}},
+    "firstcry": {"split": "split_pdf_by_orderid", "options": {"incremental": False}},
+}
+
+
+def page_stages(jsonl_path):
+    """Pages and summed per-page time by extraction path, from a run's JSONL log."""
+    stages = defaultdict(lambda: {"pages": 0, "seconds": 0.0})
+    with open(jsonl_path, encoding="utf-8") as records:
+        for line in records:
+            record = json.loads(line)
+            if "path" in record:
+                stages[record["path"]]["pages"] += 1
+                stages[record["path"]]["seconds"] += record.get("duration", 0.0)
+    return {path: {"pages": stage["pages"], "seconds": round(stage["seconds"], 3)} for path, stage in stages.items()}
+
+
+def peak_rss_mb():
+    """High-water RSS of this process (ru_maxrss on Linux also carries over what the parent used before exec)."""
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status", encoding="utf-8") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def split_once(marketplace, pdf_path, file_path, workers):
+    """Child process body: one timed split in a scratch folder, so logs and peak RSS belong to this run only."""
+    from surya.registry import load_splitter
+    from surya.runlog import start_run_log
+    case = CASES[marketplace]
+    module = load_splitter(marketplace)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix=f"bench_{marketplace}_") as scratch:
+        os.chdir(scratch)
+        try:
+            start_run_log(marketplace)
+
+            started = time.perf_counter()
+            final_output_dict = module.load_manifest(file_path)  # scratch folder: always a cold manifest cache
+            manifest_seconds = time.perf_counter() - started
+
+            options = dict(case["options"], **({"workers": workers} if marketplace == "meesho" else {}))
+            split_started = time.perf_counter()
+            order_pages = getattr(module, case["split"])(pdf_path, "outputs", final_output_dict, **options)
+            split_seconds = time.perf_counter() - split_started
+            total = time.perf_counter() - started
+
+            pages = len(fitz.open(pdf_path))
+            with open(f"logs/report_{marketplace}.json", encoding="utf-8") as report:
+                hot_stages = {stage: entry["seconds"] for stage, entry in json.load(report)["stages"].items()}
+            return {
+                "marketplace": marketplace,
+                "pages": pages,
+                "orders": len(order_pages),
+                "seconds": round(total, 3),
+                "pages_per_second": round(pages / total, 1),
+                "peak_rss_mb": peak_rss_mb(),
+                "worker_peak_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+                "stages": {"manifest": round(manifest_seconds, 3), "split": round(split_seconds, 3), "pages": page_stages(f"logs/logfile_{marketplace}.jsonl"), "hot": hot_stages},
+            }
+        finally:
+            os.chdir(cwd)  # leave the scratch folder before it is removed
+
+
+def synthetic_inputs(data_dir, marketplace, pages, image_every):
+    """Generate (once) the synthetic PDF and manifest for one benchmark size."""
+    os.makedirs(data_dir, exist_ok=True)
+    stem = os.path.join(data_dir, f"{marketplace}_{pages}_img{image_every}")
+    pdf_path, file_path = stem + ".pdf", stem + MANIFEST_EXTENSIONS[marketplace]
+    if not (os.path.exists(pdf_path) and os.path.exists(file_path)):
+        make_labels(marketplace, pdf_path, file_path, pages, image_every=image_every)
+    return os.path.abspath(pdf_path), os.path.abspath(file_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the splitters on synthetic label PDFs.")
+    parser.add_argument("--marketplace", nargs="+", default=sorted(CASES), choices=sorted(CASES))
+    parser.add_argument("--pages", nargs="+", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--image-every", type=int, default=2, help="Every n-th order gets an image-only page; 0 skips OCR entirely")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Meesho shard processes")
+    parser.add_argument("--data-dir", default="bench_data", help="Where the generated PDFs and manifests are kept between runs")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--child", nargs=2, metavar=("PDF", "MANIFEST"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(split_once(args.marketplace[0], *args.child, args.workers)))
+        return
+
+    results = []
+    print(f"{'marketplace':<10} {'pages':>6} {'orders':>6} {'seconds':>8} {'pages/s':>8} {'peak MB':>8} {'workers MB':>10}  stages")
+    for marketplace in args.marketplace:
+        for pages in args.pages:
+            pdf_path, file_path = synthetic_inputs(args.data_dir, marketplace, pages, args.image_every)
+            child = subprocess.run([sys.executable, "-m", "benchmarks.bench", "--marketplace", marketplace, "--workers", str(args.workers), "--child", pdf_path, file_path],
+                                   cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), capture_output=True, text=True)
+            if child.returncode:
+                print(f"{marketplace:<10} {pages:>6} failed:\n{child.stderr}")
+                continue
+            result = json.loads(child.stdout.strip().splitlines()[-1])
+            results.append(result)
+            stages = result["stages"]
+            paths = ", ".join(f"{path} {stage['pages']}p/{stage['seconds']}s" for path, stage in sorted(stages["pages"].items()))
+            hot = ", ".join(f"{stage} {seconds}s" for stage, seconds in stages["hot"].items())
+            print(f"{marketplace:<10} {result['pages']:>6} {result['orders']:>6} {result['seconds']:>8} {result['pages_per_second']:>8} {result['peak_rss_mb']:>8} {result['worker_peak_rss_mb']:>10}"
+                  f"  manifest {stages['manifest']}s, split {stages['split']}s ({paths}; {hot})")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as report:
+            json.dump(results, report, indent=1)
+
+
+if __name__ == "__main__":
+    main()
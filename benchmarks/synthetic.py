@@ -0,0 +1,125 @@
+import fitz  # PyMuPDF
+import pandas as pd
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4, like the marketplace downloads
+
+MEESHO_COLUMNS = (40, 200, 300, 350, 430)  # x of SKU, Size, Qty, Color, Order No.
+
+
+def _meesho_order(k, items, image):
+    po = f"1234{k:08d}"
+    awb = f"VL{k:012d}"
+    lines = ["Customer Address", "Synthetic Buyer", awb, "Product Details", list(zip(MEESHO_COLUMNS, ["SKU", "Size", "Qty", "Color", "Order No."]))]
+    rows = []
+    for j, (sku, qty) in enumerate(items, start=1):
+        label_sku = sku.replace(f"{k}-", f"{k}-\n") if k % 3 == 0 else sku  # every third order's SKU wraps in its cell
+        lines.append(list(zip(MEESHO_COLUMNS, [label_sku, "Free Size", str(qty), "Red", f"{po}_{j}"])))
+        rows.append({"Sub Order No.": f"{po}_{j}", "AWB": awb, "SKU": sku, "Qty.": qty})
+    lines += ["TAX INVOICE", "Original For Recipient", "Purchase Order No.", po, "Invoice No.", f"INV{k}"]
+    return [(lines, False)], (["Continued invoice", "Terms and conditions"], image), rows
+
+
+def _flipkart_order(k, items, image):
+    orderid = f"OD{k:018d}"
+    awb = f"FMPP{k:010d}"
+    lines = ["E-Kart Logistics", f"{orderid} PREPAID", [(257, "SKU ID | Description"), (388, "QTY")]]
+    for j, (sku, qty) in enumerate(items, start=1):
+        description = f"{j} {sku} | Synthetic item {k}" + ("\nFree Size" if k % 3 == 0 else "")  # every third order's description wraps
+        lines.append([(192, description), (388, str(qty))])
+    lines += [awb, "Tax", "Invoice", "Order Id:", orderid, f"AWB No. {awb}"]
+    rows = [{"Order Id": orderid, "SKU": sku, "Quantity": qty, "Tracking ID": awb} for sku, qty in items]
+    return [(lines, False)], (["Continued invoice", "Terms and conditions"], image), rows
+
+
+def _amazon_order(k, items, image):
+    orderid = f"408-{k:07d}-{(k * 7919) % 10000000:07d}"
+    awb = f"3625{k:08d}"
+    label = ["Ship to:", "Synthetic Buyer", (0.19, f"AWB {awb}")]  # inside amazon.LABEL_REGIONS
+    if image:
+        label.append((0.40, f"Order Id: {orderid}"))  # the scanned label shows it; a text one would start the order early
+    invoice = ["Tax Invoice/Bill of Supply/Cash Memo", f"Order Number: {orderid}", f"Invoice Number : IN-{k}", "Description Qty"]
+    invoice += [f"{j} Synthetic item | B0{k:08d} ( {sku} ) {qty}" for j, (sku, qty) in enumerate(items, start=1)]
+    invoice += ["TOTAL:"]
+    rows = [{"order-id": orderid, "sku": sku, "quantity-purchased": qty, "tracking-id": awb} for sku, qty in items]
+    return [(label, image), (invoice, False)], (["Invoice continued", "Page 2 of 2"], False), rows
+
+
+def _firstcry_order(k, items, image):
+    orderid = f"FC{k:010d}"
+    shipment_id = f"{k:09d}"
+    invoice = [f"Order No : {orderid}", f"Shipment ID : {shipment_id}", "Item Name Qty"]
+    invoice += [f"Style Code: {sku} {qty}" for sku, qty in items]
+    rows = [{"Order ID": orderid, "Vendor Style Code": sku, "Total Items": len(items), "Total Qty": qty, "AWB No": shipment_id} for sku, qty in items]
+    return [(["Ship to:", "Synthetic Buyer", f"Shipment ID : {shipment_id}"], image), (invoice, False)], (["Invoice continued", "Terms and conditions"], False), rows
+
+
+# Marketplace -> (order builder, manifest writer)
+BUILDERS = {
+    "amazon": (_amazon_order, lambda df, path: df.to_csv(path, sep="\t", index=False)),
+    "flipkart": (_flipkart_order, lambda df, path: df.to_csv(path, index=False)),
+    "meesho": (_meesho_order, lambda df, path: df.to_excel(path, index=False)),
+    "firstcry": (_firstcry_order, lambda df, path: df.to_excel(path, index=False)),
+}
+MANIFEST_EXTENSIONS = {"amazon": ".txt", "flipkart": ".csv", "meesho": ".xlsx", "firstcry": ".xlsx"}
+
+
+def _draw(page, lines):
+    """
+    Write lines top-down; (fraction, text) pairs are placed at that fraction of the page height,
+    and a list of (x, text) cells is one table row whose cells may wrap onto more lines.
+    """
+    y = 40
+    for line in lines:
+        if isinstance(line, list):
+            for x, cell in line:
+                for row, cell_line in enumerate(cell.split("\n")):
+                    page.insert_text((x, y + row * 16), cell_line, fontsize=11)
+            y += 16 * max(cell.count("\n") + 1 for _, cell in line)
+            continue
+        if isinstance(line, tuple):
+            fraction, line = line
+            y = PAGE_HEIGHT * fraction
+        page.insert_text((40, y), line, fontsize=11)
+        y += 16
+
+
+def _add_page(doc, lines, image_only, dpi):
+    page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    if not image_only:
+        _draw(page, lines)
+        return
+    scratch = fitz.open()
+    _draw(scratch.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT), lines)
+    pix = scratch[0].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)  # scanned label: no text layer
+    page.insert_image(page.rect, pixmap=pix)
+    scratch.close()
+
+
+def make_labels(marketplace, pdf_path, file_path, pages, items_every=4, continuation_every=7, image_every=2, missing_every=20, dpi=150):
+    """
+    Build a synthetic label PDF in the given marketplace's layout plus its order export.
+    :param pages: Exact page count of the PDF
+    :param items_every: Every n-th order has three items instead of one
+    :param continuation_every: Every n-th order gets an extra continuation page
+    :param image_every: Every n-th order's label (Amazon/FirstCry) or continuation page (Meesho/Flipkart) is image-only; 0 for none
+    :param missing_every: Every n-th order is left out of the manifest so the PDF fallback runs; 0 for none
+    :return: Number of orders in the PDF
+    """
+    build_order, write_manifest = BUILDERS[marketplace]
+    doc = fitz.open()
+    rows = []
+    k = 0
+    while len(doc) < pages:
+        k += 1
+        items = [(f"SKU-{k}-{j}", 1 + j % 2) for j in range(3 if k % items_every == 0 else 1)]
+        order_pages, continuation, order_rows = build_order(k, items, bool(image_every) and k % image_every == 0)
+        if continuation_every and k % continuation_every == 0:
+            order_pages.append(continuation)
+        for lines, image_only in order_pages[:pages - len(doc)]:
+            _add_page(doc, lines, image_only, dpi)
+        if not (missing_every and k % missing_every == 0):
+            rows += order_rows
+    doc.save(pdf_path, garbage=3, deflate=True)
+    doc.close()
+    write_manifest(pd.DataFrame(rows), file_path)
+    return k
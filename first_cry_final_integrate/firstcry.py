@@ -1,18 +1,28 @@
-import os, csv
-import re, camelot
-import PyPDF2
+import os, sys, csv
+import re, time
 import fitz  # PyMuPDF
-from pdf2image import convert_from_path
-import pytesseract
 import warnings
-from datetime import datetime
 import pandas as pd
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from surya.manifest import build_order_index, manifest_rows
+from surya.camelot_batch import CamelotBatch
+from surya.runlog import RunLog
+from surya.writer import OrderPdfWriter
+from surya.sink import DirectorySink
+from surya.records import OrderRecord
+from surya.label_index import LABEL_INDEX, index_orders
+from surya.pipeline import run_split
+from surya.ocr import OcrPool, page_text
+from surya.fingerprint import FingerprintStore
+from surya.stats import RunStats, timed, stage
+
 ##made
-def extract_table_with_camelot(pdf_path, page_number):
+@timed("camelot")
+def extract_table_with_camelot(camelot_batch, page_number):
     """ Try extracting table using Camelot (works for structured PDFs). """
-    tables = camelot.read_pdf(pdf_path, pages=str(page_number))
-    if tables.n > 0:
+    tables = camelot_batch.tables(page_number)
+    if len(tables) > 0:
         df = tables[0].df  # Convert to DataFrame
         df.columns = df.iloc[0] # Set first row as header
         df = df[1:].reset_index(drop=True) # Remove first row
@@ -63,113 +73,145 @@ def clean_text(text):
     text = text.replace("—", "-")  # Replace OCR misrecognized dashes
     return text
 
-def extract_text_from_page(page):
+@timed("fitz")
+def extract_text_from_page(page, ocr_pool=None):
     """Extract text using PyMuPDF or OCR if necessary."""
-    text = page.get_text("text")
-    if not text.strip():
-        # Convert page to image and apply OCR
-        pix = page.get_pixmap()
-        image = convert_from_path(pdf_path, first_page=page.number+1, last_page=page.number+1)[0]
-        custom_config = r'--oem 3 --psm 6'
-        text = pytesseract.image_to_string(image, config = custom_config)
-    return clean_text(text)
+    return clean_text(page_text(page, ocr_pool))
 
-def split_pdf_by_orderid(pdf_path, output_folder, final_output_dict):
-    """Splits a PDF into separate PDFs based on OrderID."""
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
+def split_pdf_by_orderid(pdf_path, output_folder, final_output_dict, ocr_pool=None, incremental=True, profile=False, sink=None, exporter=None, label_index=LABEL_INDEX):
+    """
+    Splits a PDF into separate PDFs based on OrderID.
+    :param ocr_pool: OcrPool for image-only pages (default: a pool owned by this run)
+    :param incremental: Reuse OCR and camelot results of unchanged pages and keep orders whose pages and manifest rows did not change
+    :param profile: Also write a cProfile dump next to the run report (logs/profile_firstcry.prof)
+    :param sink: Output sink from surya.sink (default: loose files in output_folder); archive sinks always write every order
+    :param exporter: Optional OrderExporter receiving each order once it is final
+    :param label_index: SQLite label index (LabelIndex) the written orders are added to at the end, None to skip
+    """
+    stats = RunStats("firstcry", profile=profile).start()
+    sink = sink or DirectorySink(output_folder)
+    incremental = incremental and sink.reusable
     
     order_pages = {}
     doc = fitz.open(pdf_path)
     skip_page_for_now = []
     prev_order_id= ""
     order_details = {}
+    manifest_index = build_order_index(final_output_dict, "Order ID")
+    log = RunLog("firstcry")
+    try:
+        fingerprints = FingerprintStore(output_folder, doc, manifest_index) if incremental else None
+        writer = OrderPdfWriter(doc, output_folder, log, fingerprints, sink, exporter)
+        open_order = None  # last order started; written out as soon as the next one begins
+        own_ocr_pool = ocr_pool is None
+        ocr_pool = ocr_pool or OcrPool()
+
+        # Phase 1: text pass over every page; order pages missing from the manifest get their tables in batched camelot calls
+        texts = [extract_text_from_page(page) for page in doc]
+        image_pages = [i for i, text in enumerate(texts) if not text]  # OCR'd concurrently as one batch
+        pending = []  # image pages whose OCR text is not known from an earlier run
+        for i in image_pages:
+            cached = fingerprints.cached(i, "ocr") if fingerprints else None
+            if cached is None:
+                pending.append(i)
+            else:
+                texts[i] = cached
+        for i, text in zip(pending, ocr_pool.ocr_pages([doc[i] for i in pending])):
+            texts[i] = clean_text(text)
+            if fingerprints:
+                fingerprints.store(i, "ocr", texts[i])
+        camelot_pages = []
+        for i, text in enumerate(texts):
+            orderid = extract_order_details(text)[0] if text else None
+            if orderid and orderid not in manifest_index and not (fingerprints and fingerprints.cached(i, "camelot") is not None):
+                camelot_pages.append(i+1)
+        camelot_batch = CamelotBatch(pdf_path)
+        camelot_batch.prefetch(camelot_pages)
     
-    for i, page in enumerate(doc):
-        text = extract_text_from_page(page)
-        if text:
-            orderid, scanner_page_match, shipmentid = extract_order_details(text)
-            if orderid != prev_order_id:
-              if orderid:
-                prev_order_id = orderid
-            if orderid:
-                order_details = {orderid: [{"sku": d["Vendor Style Code"], "Qty": d["Total Qty"], "Items": d["Total Items"], "shipment_id": d["AWB No"]} for d in final_output_dict if d["Order ID"] == orderid]}
-                if not order_details[orderid]:
-                  order_details[orderid] = extract_table_with_camelot(pdf_path, i+1)
-                  [d.update({'Items': len(order_details[orderid])}) for d in order_details[orderid]]
-                  [d.update({'shipment_id': shipmentid}) for d in order_details[orderid]]
-                  with open("logs/logfile_firstcry.txt", "a+", encoding="utf-8") as log_file:
-                    log_file.write(f"{orderid} Not found from csv, hence scraping it from pdf itself.\n")
+        for i, page in enumerate(doc):
+            page_started = time.perf_counter()
+            text = texts[i]
+            path_used = "empty"
+            shipmentid = None
+            if text:
+                path_used = "continuation"
+                orderid, scanner_page_match, shipmentid = extract_order_details(text)
+                if orderid != prev_order_id:
+                  if orderid:
+                    prev_order_id = orderid
+                if orderid:
+                    with stage("manifest"):
+                        order_details = {orderid: [{"sku": d["Vendor Style Code"], "Qty": d["Total Qty"], "Items": d["Total Items"], "shipment_id": d["AWB No"]} for d in manifest_index.get(orderid, [])]}
+                    if not order_details[orderid]:
+                      if fingerprints:
+                        order_details[orderid] = fingerprints.cached_call(i, "camelot", lambda: extract_table_with_camelot(camelot_batch, i+1))
+                      else:
+                        order_details[orderid] = extract_table_with_camelot(camelot_batch, i+1)
+                      [d.update({'Items': len(order_details[orderid])}) for d in order_details[orderid]]
+                      [d.update({'shipment_id': shipmentid}) for d in order_details[orderid]]
+                      path_used = "camelot"
+                      log.write(f"{orderid} Not found from csv, hence scraping it from pdf itself.\n")
+                    else:
+                      path_used = "manifest"
+                      log.write(f"{orderid} found from csv.\n")
+                    if orderid not in order_pages:
+                        if open_order:
+                            writer.emit(order_pages[open_order])
+                        open_order = orderid
+                    if orderid not in order_pages:
+                        order_pages[orderid] = OrderRecord(orderid, pages=skip_page_for_now)
+                    order_pages[orderid].pages.append(i)
+                    skip_page_for_now = []
+                elif scanner_page_match:
+                    path_used = "skipped"
+                    skip_page_for_now = [i]
                 else:
-                  with open("logs/logfile_firstcry.txt", "a+", encoding="utf-8") as log_file:
-                    log_file.write(f"{orderid} found from csv.\n")
-                if orderid not in order_pages and not skip_page_for_now:
-                    order_pages[orderid] = []
-                elif orderid not in order_pages and skip_page_for_now:
-                    order_pages[orderid] = skip_page_for_now
-                order_pages[orderid].append(i)
-                skip_page_for_now = []
-            elif scanner_page_match:
-                skip_page_for_now = [i]
-            else:
-                order_pages[prev_order_id].append(i)
-        if order_details and not skip_page_for_now:
-            if orderid:
-                order_pages[orderid].append(order_details[orderid])
-                order_details = {}
-            else:
-                order_pages[prev_order_id].append(order_details[orderid])
-                order_details = {}
-        with open("logs/logfile_firstcry.txt", "a+", encoding="utf-8") as log_file:
-          log_file.write(f"{i+1} page completed.\n")
+                    order_pages[prev_order_id].pages.append(i)
+            if order_details and not skip_page_for_now:
+                if orderid:
+                    order_pages[orderid].add_items(order_details[orderid])
+                    order_details = {}
+                else:
+                    order_pages[prev_order_id].add_items(order_details[orderid])
+                    order_details = {}
+            log.write(f"{i+1} page completed.\n")
+            log.record(page=i, order_id=prev_order_id, awb=shipmentid, path=path_used, duration=round(time.perf_counter() - page_started, 4))
     
-    # Create PDFs for each OrderID
-    with open(pdf_path, "rb") as infile:
-        reader = PyPDF2.PdfReader(infile)
-        
-        for orderid, pages in order_pages.items():
-            writer = PyPDF2.PdfWriter()
-            for page_num in pages:
-                if isinstance(page_num, int):
-                  writer.add_page(reader.pages[page_num])
-            
-            output_pdf_path = os.path.join(output_folder, f"Order_{orderid}.pdf")
-            order_pages[orderid].append({"output_pdf_location" : output_pdf_path})
-            with open(output_pdf_path, "wb") as output_pdf:
-                writer.write(output_pdf)
-            with open("logs/logfile_firstcry.txt", "a+", encoding="utf-8") as log_file:
-                log_file.write(f"Saved: {output_pdf_path}\n")
-    #For testing created a csv.
-    rows = [{"item": item} for _, items in order_pages.items() for item in items if isinstance(item, list)]
-    flat_list = [item for entry in rows for item in entry["item"]]
-    df = pd.DataFrame(flat_list)
-    df.to_csv("order_pages.csv", index=False)
+        # Write the orders still open, plus any that gained pages after they were emitted
+        writer.finish(order_pages)
+        if fingerprints:
+            fingerprints.save()
+        if own_ocr_pool:
+            ocr_pool.close()
+    finally:
+        log.close()
+    if label_index:
+        index_orders(label_index, "firstcry", order_pages, pdf_path)
+    stats.finish()
     return order_pages
 
-def excel_to_dataframe(file_path):
+REQUIRED_COLUMNS = ["Order ID", "Vendor Style Code", "Total Items", "Total Qty", "AWB No"]
+MANIFEST_DTYPES = {"Order ID": str, "Vendor Style Code": str, "AWB No": str}
+
+def load_manifest(file_path):
+    """Order export (.xlsx) rows with only REQUIRED_COLUMNS, read through the columnar manifest cache."""
+    return manifest_rows(file_path, REQUIRED_COLUMNS, MANIFEST_DTYPES)
+
+
+def run(pdf_path, file_path, output_folder, ocr_pool=None, profile=False, **outputs):
     """
-    Reads a tab-delimited .txt file and converts it to a Pandas DataFrame.
-    :param file_path: Path to the .txt file
-    :return: Pandas DataFrame
+    Split one FirstCry label PDF using its order export (.xlsx), starting a fresh run log.
+    :param outputs: pick_batches, archive, export and label_index, see surya.pipeline.run_split
     """
-    df = pd.read_excel(file_path)
-    return df
-
-def grab_required_fields(data):
-    required_columns = ["Order ID", "Vendor Style Code", "Total Items", "Total Qty", "AWB No"]  # Replace with actual column names
-    filtered_data = [{col: row[col] for col in required_columns if col in row} for row in data]
-    return filtered_data
+    pd.set_option('future.no_silent_downcasting', True)
+    final_output_dict = load_manifest(file_path)
+    warnings.filterwarnings("ignore", category=UserWarning, module="camelot.parsers.base")
+    return run_split("firstcry", split_pdf_by_orderid, pdf_path, output_folder, final_output_dict, ocr_pool=ocr_pool, profile=profile, **outputs)
 
 
 if __name__ == "__main__":
-    pd.set_option('future.no_silent_downcasting', True)
     file_path = "first_cry_final_integrate/firstcry.xlsx"  # Replace with the actual file path
-    df = excel_to_dataframe(file_path)
-    final_output_dict = grab_required_fields(df.to_dict(orient="records"))
     # Example usage
-    warnings.filterwarnings("ignore", category=UserWarning, module="camelot.parsers.base")
     pdf_path = "first_cry_final_integrate/firstcry.pdf"  # Replace with your PDF file path
     output_folder = "outputs/firstcry_output_pdfs"  # Folder to save separated PDFs
-    with open("logs/logfile_firstcry.txt", "w+", encoding="utf-8") as log_file:
-      log_file.write(f"Starting the log for mentioned time:{datetime.today().strftime("%Y-%m-%d %H:%M:%S")}\n")
-    op = split_pdf_by_orderid(pdf_path, output_folder, final_output_dict)
\ No newline at end of file
+    op = run(pdf_path, file_path, output_folder)
\ No newline at end of file
@@ -1,21 +1,32 @@
 import fitz  # PyMuPDF
-import os, camelot
+import os, sys
 import pandas as pd
-import re, csv
+import re, csv, time
 from itertools import zip_longest
-from datetime import datetime
 import numpy as np
-# from pydash import clean as _c
 
-def extract_text_with_fitz(input_pdf, page_num, only_orderid=False):
-    doc = fitz.open(input_pdf)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from surya.document import PdfSession
+from surya.layout import visual_lines, find_header, table_rows
+from surya.manifest import build_order_index, manifest_rows
+from surya.camelot_batch import CamelotBatch
+from surya.runlog import RunLog
+from surya.checkpoint import open_checkpoint, remaining_ranges
+from surya.stats import RunStats, timed, stage
+from surya.writer import add_cropped_label, save_order_pdf
+from surya.sink import DirectorySink
+from surya.records import OrderRecord, segment_records
+from surya.label_index import LABEL_INDEX, index_orders
+from surya.pipeline import run_split
+# from pydash import clean as _c
 
+@timed("fitz")
+def extract_text_with_fitz(session, page_num, only_orderid=False):
     # Extract text from each page
     if only_orderid:
-      page = doc[page_num-1]
+      text = session.text(page_num-1)
     else:
-      page = doc[page_num]
-    text = page.get_text("text")
+      text = session.text(page_num)
     order_id_match = re.search(r"E-Kart Logistics\s*\n*(OD\d+)", text)
     awb = re.search(r"AWB No\. (\w+)", text.replace("\n", " "))
     if only_orderid:
@@ -46,10 +57,47 @@ def extract_text_with_fitz(input_pdf, page_num, only_orderid=False):
     else:
       return {}
 
-def extract_text_with_camelot(pdf_path, page_number):
+ITEM_COLUMNS = ["SKU ID | Description", "QTY"]
+
+def label_order_id(session, page_num):
+    """Order id printed under the E-Kart Logistics header, or None on continuation pages."""
+    match = re.search(r"E-Kart Logistics\s*\n*(OD\d+)", session.text(page_num))
+    return match.group(1) if match else None
+
+@timed("layout")
+def extract_table_with_words(session, page_num):
+    """
+    Reads every SKU ID | Description / QTY row from word positions. The text layer
+    only yields the first row, and a wrapped description pushes its QTY out of place.
+    :return: Column lists like extract_text_with_fitz, one entry per item, or {} when the table can't be read this way
+    """
+    order_id = label_order_id(session, page_num)
+    if not order_id:
+      return {}
+    lines = visual_lines(session.words(page_num))
+    header, columns = find_header(lines, ITEM_COLUMNS)
+    if header is None:
+      return {}
+    rows = table_rows(lines[header+1:], columns, "QTY", r"\d+")
+    if not rows:
+      return {}
+    awb = re.search(r"AWB No\. (\w+)", session.text(page_num).replace("\n", " "))
+    return {
+      " ID | Description": [row["SKU ID | Description"] for row in rows],
+      "QTY": [row["QTY"] for row in rows],
+      "Order No.": [order_id] * len(rows),
+      "AWB": [awb.group(1) if awb else ""] * len(rows),
+    }
+
+def read_item_table(session, page_num):
+    """Item rows by word position, falling back to the text layer's first row when the layout isn't recognized."""
+    return extract_table_with_words(session, page_num) or extract_text_with_fitz(session, page_num)
+
+@timed("camelot")
+def extract_text_with_camelot(session, camelot_batch, page_number):
     """ Try extracting table using Camelot (works for structured PDFs). """
-    tables = camelot.read_pdf(pdf_path, pages=str(page_number), flavor="lattice")
-    if tables.n > 0:
+    tables = camelot_batch.tables(page_number)
+    if len(tables) > 0:
         digit_match = re.compile(r"\d_\d", re.IGNORECASE)
         df = tables[0].df
         # Find indices of rows where any cell contains "SKU"
@@ -76,7 +124,7 @@ def extract_text_with_camelot(pdf_path, page_number):
         filtered_df = filtered_df[1:]
         if str(filtered_df["QTY"][1]) == "nan":
           filtered_df.at[1, 'QTY'] = filtered_df.at[1, 'SKU ID | Description'].split(" ")[-1]
-        order_id, awb = extract_text_with_fitz(pdf_path, page_number, only_orderid=True)
+        order_id, awb = extract_text_with_fitz(session, page_number, only_orderid=True)
         filtered_df.loc[:, 'Order No.'] = [order_id]
         filtered_df.loc[:, 'AWB'] = [awb]
         filtered_df = filtered_df.rename(columns={'SKU ID | Description': ' ID | Description'})
@@ -85,105 +133,157 @@ def extract_text_with_camelot(pdf_path, page_number):
       return {} 
 
 
-def split_pdf_custom(input_pdf, output_folder, final_output_dict, top_ratio=0.4):
+def split_pdf_custom(input_pdf, output_folder, final_output_dict, top_ratio=0.4, resume=True, incremental=True, profile=False, compact=True, sink=None, exporter=None, label_index=LABEL_INDEX):
     """
     Splits a PDF page into two parts based on a custom split ratio.
     
     :param input_pdf: Path to the input PDF file
     :param top_ratio: Fraction of the page height for the top part (default is 40%)
+    :param resume: Continue an interrupted run from the checkpoint journal next to output_folder (False starts over)
+    :param incremental: Keep the orders a previous run wrote from the same pages and manifest rows instead of splitting them again
+    :param profile: Also write a cProfile dump next to the run report (logs/profile_flipkart.prof)
+    :param compact: Save the order PDFs with COMPACT_SAVE (garbage collection, deflate, dedup, object streams)
+    :param sink: Output sink from surya.sink (default: loose files in output_folder); archive sinks always split every page
+    :param exporter: Optional OrderExporter receiving each order once it is final
+    :param label_index: SQLite label index (LabelIndex) the written orders are added to at the end, None to skip
     """
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
-    doc = fitz.open(input_pdf)  # Open the input PDF
+    stats = RunStats("flipkart", profile=profile).start()
+    sink = sink or DirectorySink(output_folder)
+    resume = resume and sink.reusable
+    incremental = incremental and sink.reusable
+    session = PdfSession(input_pdf)  # Open the input PDF once for the whole run
+    doc = session.doc
     
     order_pages = {}
+    manifest_index = build_order_index(final_output_dict, "Order Id")
+    log = RunLog("flipkart")
+    try:
+        orderid = awb = None
+        open_doc = None  # current order's output, kept in memory until the next order starts
 
-    for page_num, page in enumerate(doc):
-        if not page_num >= 36:
-          continue
-        if result_dict := extract_text_with_fitz(input_pdf, page_num):
-            if not result_dict.get("Order No.", None):
-              result_dict = extract_text_with_camelot(input_pdf, page_num+1)
-        else:
-            result_dict = extract_text_with_camelot(input_pdf, page_num+1)
-        if result_dict.get("Order No.", None):
-            new_doc = fitz.open()  # Create a new PDF document
-            page = doc[page_num]  # Get current page
-            rect = page.rect  # Get original page size
-            top_height = rect.height * top_ratio  # Calculate top section height
-            bottom_height = rect.height - top_height  # Remaining height for the bottom section
-
-            # --- Create Top Part (Custom Height) ---
-            top_rect = fitz.Rect(0, 0, rect.width, top_height)
-            top_page = new_doc.new_page(width=rect.width, height=top_height)
-            top_page.show_pdf_page(top_page.rect, doc, page_num, clip=top_rect)
-
-            # --- Create Bottom Part (Custom Height) ---
-            bottom_rect = fitz.Rect(0, top_height, rect.width, rect.height)
-            bottom_page = new_doc.new_page(width=rect.width, height=bottom_height)
-            bottom_page.show_pdf_page(bottom_page.rect, doc, page_num, clip=bottom_rect)
-
-            # Save the new PDF with two pages per original page
-            df = pd.DataFrame(result_dict)
-            df = df.astype(str)
-            orderid_name = "_".join(set([i.split("_")[0] for i in result_dict.get("Order No.", [])]))
-            for i in df.to_dict(orient="records"):
-              orderid = i.get("Order No.", None)
-              order_details = {orderid: [{"sku": d["SKU"], "Qty": d["Quantity"], "AWB":d["Tracking ID"]} for d in final_output_dict if d["Order Id"] == orderid]}
-              if not order_details[orderid]:
-                sku = re.sub(r'^\d\s*', '', i.get(" ID | Description", None).split("|")[0]) if i.get(" ID | Description", None) else ""
-                order_details[orderid] = [{
-                "sku" : sku.strip(),
-                "Qty" : i.get("QTY", None).strip(),
-                "AWB": i.get("AWB", None).strip(),
-              }]
-                with open("logs/logfile_flipkart.txt", "a+", encoding="utf-8") as log_file:
-                  log_file.write(f"did not get the {orderid} from csv, getting it from pdf itself\n")
-              order_pages[str(orderid)] = []
-              order_pages[str(orderid)] = order_details[orderid]
-              with open("logs/logfile_flipkart.txt", "a+", encoding="utf-8") as log_file:
-                log_file.write(f"Order ID: {orderid}, SKU: {order_details[orderid][0]["sku"]}, Qty: {i.get("QTY", None)}\n")
-                log_file.write("-" * 50 + "\n")
-            output_pdf_path = os.path.join(output_folder, f"Order_{orderid_name}.pdf")
-            order_pages[str(orderid)].append({"output_pdf_location" : output_pdf_path})
-            new_doc.save(output_pdf_path)
-            with open("logs/logfile_flipkart.txt", "a+", encoding="utf-8") as log_file:
-              log_file.write(f"✅ Split PDF saved as: {output_pdf_path}\n")
-        else:
-            new_doc = fitz.open(output_pdf_path)
-            new_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
-            new_doc.insert_page(-1) 
-            with open("logs/logfile_flipkart.txt", "a+", encoding="utf-8") as log_file:
-              log_file.write(f"❌ Order ID not found in the page {page_num}. Hence concatenating it with previous pdf.\n")
-            output_pdf_path_temp = os.path.join(output_folder, f"Order_{orderid_name}_temp.pdf")
-            new_doc.save(output_pdf_path_temp)
-            os.remove(output_pdf_path)
-            os.rename(output_pdf_path_temp, output_pdf_path)
-        new_doc.close()
+        journal, segments, fingerprints = open_checkpoint(output_folder, input_pdf, doc, manifest_index, {"top_ratio": top_ratio, "table": "words"}, log, resume, incremental)
+        first_page = {}  # order_pages key -> page its order starts on, to return orders in page order
+        for segment in segments:
+            records = segment_records(segment)
+            order_pages.update(records)
+            first_page.update((key, segment["pages"][0]) for key, _ in records)
+            if exporter:
+                for _, record in records:
+                    exporter.write(record)
+        pages_to_split = [page_num for start, stop in remaining_ranges(segments, 0, len(doc)) for page_num in range(start, stop)]
+        order_start = None
+        touched = set()  # order_pages keys changed since the last journal commit
+
+        def close_order(next_page):
+            """Save the open order and commit pages [order_start, next_page) to the journal."""
+            save_order_pdf(open_doc, sink, output_name, log, compact, order_id=orderid_name, awb=awb, first_page=order_start, pages=next_page - order_start)
+            journal.commit(order_start, next_page, {key: order_pages[key] for key in touched}, output_pdf_path, {"orderid": orderid, "awb": awb}, touched)
+            if exporter:
+                for key in sorted(touched):
+                    exporter.write(order_pages[key])
+            touched.clear()
+
+        # Phase 1: collect every order page the fitz pass cannot read and fetch their tables in batched camelot calls
+        camelot_batch = CamelotBatch(input_pdf, flavor="lattice")
+        camelot_batch.prefetch([page_num+1 for page_num in pages_to_split if label_order_id(session, page_num) and not read_item_table(session, page_num).get("Order No.", None)])
+
+        for page_num in pages_to_split:
+            if open_doc is not None and page_num != last_page + 1:
+                close_order(last_page + 1)  # a kept order follows, the open one ends here
+                open_doc = None
+            last_page = page_num
+            page_started = time.perf_counter()
+            path_used = "layout"
+            if not (result_dict := extract_table_with_words(session, page_num)):
+                path_used = "fitz"
+                result_dict = extract_text_with_fitz(session, page_num)
+            if result_dict:
+                if not result_dict.get("Order No.", None):
+                  path_used = "camelot"
+                  result_dict = extract_text_with_camelot(session, camelot_batch, page_num+1)
+            elif label_order_id(session, page_num):
+                path_used = "camelot"
+                result_dict = extract_text_with_camelot(session, camelot_batch, page_num+1)
+            if result_dict.get("Order No.", None):
+                if open_doc is not None:
+                    close_order(page_num)
+                order_start = page_num
+                new_doc = fitz.open()  # Create a new PDF document
+                add_cropped_label(new_doc, doc, page_num, top_ratio)
+
+                # Save the new PDF with two pages per original page
+                df = pd.DataFrame(result_dict)
+                df = df.astype(str)
+                orderid_name = "_".join(set([i.split("_")[0] for i in result_dict.get("Order No.", [])]))
+                pdf_items = {}  # orderid -> item rows read from the label when the manifest lacks the order
+                label_keys = []  # order_pages keys of the orders on this label
+                for i in df.to_dict(orient="records"):
+                  orderid = i.get("Order No.", None)
+                  with stage("manifest"):
+                    order_details = {orderid: [{"sku": d["SKU"], "Qty": d["Quantity"], "AWB":d["Tracking ID"]} for d in manifest_index.get(orderid, [])]}
+                  if not order_details[orderid]:
+                    sku = re.sub(r'^\d\s*', '', i.get(" ID | Description", None).split("|")[0]) if i.get(" ID | Description", None) else ""
+                    pdf_items.setdefault(orderid, []).append({
+                    "sku" : sku.strip(),
+                    "Qty" : i.get("QTY", None).strip(),
+                    "AWB": i.get("AWB", None).strip(),
+                  })
+                    order_details[orderid] = list(pdf_items[orderid])
+                    log.write(f"did not get the {orderid} from csv, getting it from pdf itself\n")
+                  elif path_used != "camelot":
+                    path_used = "manifest"
+                  order_pages[str(orderid)] = OrderRecord(str(orderid), pages=[page_num], items=order_details[orderid])
+                  label_keys.append(str(orderid))
+                  touched.add(str(orderid))
+                  first_page[str(orderid)] = page_num
+                  log.write(f"Order ID: {orderid}, SKU: {order_details[orderid][0]["sku"]}, Qty: {i.get("QTY", None)}\n")
+                  log.write("-" * 50 + "\n")
+                output_name = f"Order_{orderid_name}.pdf"
+                output_pdf_path = sink.location(output_name)
+                for key in label_keys:
+                    order_pages[key].output_path = output_pdf_path  # the orders on one label share its PDF
+                open_doc = new_doc
+                awb = order_details[orderid][0]["AWB"]
+            else:
+                path_used = "continuation"
+                for key in dict.fromkeys(label_keys):
+                    order_pages[key].pages.append(page_num)
+                open_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
+                open_doc.insert_page(-1) 
+                log.write(f"❌ Order ID not found in the page {page_num}. Hence concatenating it with previous pdf.\n")
+            log.record(page=page_num, order_id=orderid, awb=awb, path=path_used, duration=round(time.perf_counter() - page_started, 4))
+        if open_doc is not None:
+            close_order(last_page + 1)
+        if fingerprints:
+            fingerprints.remember_segments(journal.load())
+            fingerprints.save()
+        journal.complete()
+    finally:
+        log.close()
+    session.close()
+    if label_index:
+        index_orders(label_index, "flipkart", order_pages, input_pdf)
+    stats.finish()
         
-    return order_pages
+    return dict(sorted(order_pages.items(), key=lambda item: first_page[item[0]]))
   
-def csv_to_dataframe(file_path):
+REQUIRED_COLUMNS = ["Order Id", "SKU", "Quantity", "Tracking ID"]
+MANIFEST_DTYPES = {"Order Id": str, "SKU": str, "Tracking ID": str}
+
+def load_manifest(file_path):
+    """Order export (.csv) rows with only REQUIRED_COLUMNS, read through the columnar manifest cache."""
+    return manifest_rows(file_path, REQUIRED_COLUMNS, MANIFEST_DTYPES)
+
+def run(pdf_path, file_path, output_folder, top_ratio=0.46, profile=False, **outputs):
     """
-    Reads a tab-delimited .txt file and converts it to a Pandas DataFrame.
-    :param file_path: Path to the .txt file
-    :return: Pandas DataFrame
+    Split one Flipkart label PDF using its order export (.csv), starting a fresh run log.
+    :param outputs: pick_batches, archive, export and label_index, see surya.pipeline.run_split
     """
-    df = pd.read_csv(file_path, delimiter=',')
-    return df
-  
-def grab_required_fields(data):
-    required_columns = ["Order Id", "SKU", "Quantity", "Tracking ID"]  # Replace with actual column names
-    filtered_data = [{col: row[col] for col in required_columns if col in row} for row in data]
-    return filtered_data
-  
+    pd.set_option('future.no_silent_downcasting', True)
+    final_output_dict = load_manifest(file_path)
+    return run_split("flipkart", split_pdf_custom, pdf_path, output_folder, final_output_dict, cropped=True, top_ratio=top_ratio, profile=profile, **outputs)
 
 if __name__ == "__main__":
-    pd.set_option('future.no_silent_downcasting', True)
     file_path = "flipkart_final_integrate/flipkart.csv"  # Replace with the actual file path
-    df = csv_to_dataframe(file_path)
-    final_output_dict = grab_required_fields(df.to_dict(orient="records"))
     output_folder = "outputs/flipkart_output_pdfs"  # Folder to save separated PDFs
-    with open("logs/logfile_flipkart.txt", "w+", encoding="utf-8") as log_file:
-      log_file.write(f"Starting the log for mentioned time:{datetime.today().strftime("%Y-%m-%d %H:%M:%S")}\n")
-    op = split_pdf_custom("flipkart_final_integrate/flipkart.pdf", output_folder, final_output_dict, top_ratio=0.46)
\ No newline at end of file
+    op = run("flipkart_final_integrate/flipkart.pdf", file_path, output_folder)
\ No newline at end of file
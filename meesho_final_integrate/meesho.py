@@ -1,9 +1,24 @@
 import fitz  # PyMuPDF
-import os, camelot
+import os, sys
 import pandas as pd
-import re, csv
+import re, csv, time
 from itertools import zip_longest
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import heapq
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from surya.document import PdfSession
+from surya.layout import visual_lines, find_header, table_rows
+from surya.manifest import build_order_index, manifest_rows
+from surya.camelot_batch import CamelotBatch
+from surya.runlog import RunLog
+from surya.checkpoint import CheckpointJournal, open_checkpoint, remaining_ranges
+from surya.stats import RunStats, timed, stage
+from surya.writer import add_cropped_label, save_order_pdf, COMPACT_SAVE
+from surya.sink import DirectorySink
+from surya.records import OrderRecord, segment_records
+from surya.label_index import LABEL_INDEX, index_orders
+from surya.pipeline import run_split
 
 def clean_dict(dict):
   if not dict:
@@ -37,13 +52,15 @@ def clean_dict(dict):
           cleaned_dict[k] = v
   return cleaned_dict
 
-def extract_text_with_fitz(input_pdf, page_num, read_all = False):
-    doc = fitz.open(input_pdf)
+def purchase_order_key(sub_order_no):
+    """Sub Order No. "<purchase order>_<item>" -> purchase order no. used on the label."""
+    return str(sub_order_no).split("_")[0].strip()
 
+@timed("fitz")
+def extract_text_with_fitz(session, page_num, read_all = False):
     # Extract text from each page
     data_dict = {}
-    page = doc[page_num]
-    text = page.get_text("text")
+    text = session.text(page_num)
     awb = re.search(r"(\b[A-Z0-9]{6,}\b)\s*Product Details", text.replace("\n"," "))
     match = re.search(r"Product Details\n(.*?)\nTAX INVOICE", text, re.DOTALL)
     if not match:
@@ -79,10 +96,39 @@ def extract_text_with_fitz(input_pdf, page_num, read_all = False):
     else:
       return {}
 
-def extract_text_with_camelot(pdf_path, page_number):
+PRODUCT_COLUMNS = ["SKU", "Size", "Qty", "Color", "Order No."]
+
+@timed("layout")
+def extract_table_with_words(session, page_num):
+    """
+    Rebuilds the Product Details table from word positions instead of cutting its text
+    lines into groups of five, so a wrapped SKU stays one cell and "Free Size" stays in Size.
+    :return: Column lists like extract_text_with_fitz(read_all=True), or {} when the table can't be read this way
+    """
+    ids = extract_text_with_fitz(session, page_num)
+    if not ids:
+        return {}
+    lines = visual_lines(session.words(page_num))
+    header, columns = find_header(lines, PRODUCT_COLUMNS)
+    if header is None:
+        return {}
+    rows = table_rows(lines[header+1:], columns, "Qty", r"\d+", stop="TAX INVOICE")
+    if not rows:
+        return {}
+    data_dict = {key: [row[key] for row in rows] for key in PRODUCT_COLUMNS}
+    data_dict["purchase_order_no"] = ids["purchase_order_no"] * len(rows)
+    data_dict["AWB"] = ids["AWB"] * len(rows)
+    return data_dict
+
+def read_product_table(session, page_num):
+    """Product Details rows by word position, falling back to the text lines (clean_dict) when the layout isn't recognized."""
+    return extract_table_with_words(session, page_num) or clean_dict(extract_text_with_fitz(session, page_num, read_all=True))
+
+@timed("camelot")
+def extract_text_with_camelot(camelot_batch, page_number):
     """ Try extracting table using Camelot (works for structured PDFs). """
-    tables = camelot.read_pdf(pdf_path, pages=str(page_number))
-    if tables.n > 0:
+    tables = camelot_batch.tables(page_number)
+    if len(tables) > 0:
         digit_match = re.compile(r"\d_\d", re.IGNORECASE)
         only_digit_match = re.compile(r"^\d+$", re.IGNORECASE)
         df = tables[0].df
@@ -134,62 +180,81 @@ def extract_text_with_camelot(pdf_path, page_number):
       return {}     
 
 
-def split_pdf_custom(input_pdf, output_folder, final_output_dict, top_ratio=0.4):
+def needs_camelot(session, page_num, manifest_index):
+    """True when split_page_range will fall back to camelot for this page (not in manifest, fitz Qty unreadable)."""
+    result_dict = extract_text_with_fitz(session, page_num)
+    if not (result_dict and result_dict.get("AWB")[0]):
+      return False
+    if all(manifest_index.get(orderid) for orderid in result_dict["purchase_order_no"]):
+      return False
+    fitz_dict = read_product_table(session, page_num)
+    return bool(fitz_dict) and len(fitz_dict["Qty"]) != len(list(filter(lambda x: re.search(r"^\d+$", x), fitz_dict["Qty"])))
+
+def split_page_range(session, sink, manifest_index, top_ratio, start, stop, log, journal=None, state=None, compact=True, keep_last=False, exporter=None):
     """
-    Splits a PDF page into two parts based on a custom split ratio.
-    
-    :param input_pdf: Path to the input PDF file
-    :param top_ratio: Fraction of the page height for the top part (default is 40%)
+    Splits pages [start, stop) of an open PdfSession into per-AWB label PDFs.
+
+    Pages at the start of the range that carry no order id, or only orders
+    without an AWB in the manifest, belong to an order that began before
+    `start`; they are returned as "leading_pages" (and the items read on them
+    as "leading_items") so the caller can append them to that order.
+    :param journal: Optional CheckpointJournal; every saved order commits its pages and entries to it
+    :param state: Loop state of the order before `start` when resuming, {"prev_awb": ..., "order_pages": {prev_awb: OrderRecord}}
+    :param sink: Output sink from surya.sink the orders are written to
+    :param compact: Save the order PDFs with COMPACT_SAVE
+    :param keep_last: Return the range's last order as "kept" instead of writing it, for sinks that cannot append to a written order
+    :param exporter: Optional OrderExporter receiving every order but the range's last one, which the caller exports after the next range's leading pages
+    :return: dict with "start", "order_pages", "leading_pages", "leading_items", "last_output", "kept", "state" and "exported" (orders before the last one went to exporter)
     """
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
-    doc = fitz.open(input_pdf)  # Open the input PDF
-    
-    order_pages = {}
+    doc = session.doc
+    state = state or {}
+    order_pages = dict(state.get("order_pages", {}))
     order_details = {}
+    leading_pages = []
+    leading_items = []
+    prev_awb = state.get("prev_awb")
+    order_start = None
+    touched = set()  # order_pages keys changed since the last journal commit
+    touched_ids = set()  # manifest keys looked up since the last journal commit
+    orderid = None
+    output_pdf_path = output_name = None
+    open_doc = None  # current order's output, kept in memory until the next order starts
 
-    for page_num, page in enumerate(doc):
-        if not page_num >= 1310:
-          continue
-        result_dict = extract_text_with_fitz(input_pdf, page_num)
+    # Phase 1: collect every page that needs table extraction and fetch them in batched camelot calls
+    camelot_batch = CamelotBatch(session.path)
+    camelot_batch.prefetch([page_num+1 for page_num in range(start, stop) if needs_camelot(session, page_num, manifest_index)])
+
+    for page_num in range(start, stop):
+        page_started = time.perf_counter()
+        path_used = "manifest"
+        result_dict = extract_text_with_fitz(session, page_num)
             # if result_dict.get("Order No.", None):
             #     istext = bool(re.fullmatch(r"[a-zA-Z]+", result_dict.get("Order No.", [None])[0]))
             #     if istext:
-            #       result_dict = extract_text_with_camelot(input_pdf, page_num+1)
+            #       result_dict = extract_text_with_camelot(session, page_num+1)
             # else:
-            #     result_dict = extract_text_with_camelot(input_pdf, page_num+1)
-        if result_dict and result_dict.get("AWB")[0]:
-            new_doc = fitz.open()  # Create a new PDF document
-            page = doc[page_num]  # Get current page
-            rect = page.rect  # Get original page size
-            top_height = rect.height * top_ratio  # Calculate top section height
-            bottom_height = rect.height - top_height  # Remaining height for the bottom section
-
-            # --- Create Top Part (Custom Height) ---
-            top_rect = fitz.Rect(0, 0, rect.width, top_height)
-            top_page = new_doc.new_page(width=rect.width, height=top_height)
-            top_page.show_pdf_page(top_page.rect, doc, page_num, clip=top_rect)
-
-            # --- Create Bottom Part (Custom Height) ---
-            bottom_rect = fitz.Rect(0, top_height, rect.width, rect.height)
-            bottom_page = new_doc.new_page(width=rect.width, height=bottom_height)
-            bottom_page.show_pdf_page(bottom_page.rect, doc, page_num, clip=bottom_rect)
-
+            #     result_dict = extract_text_with_camelot(session, page_num+1)
+        label = bool(result_dict and result_dict.get("AWB")[0])
+        new_doc = None  # opened by the first row of the page with an AWB of its own
+        if label:
             # Save the new PDF with two pages per original page
             df = pd.DataFrame(result_dict)
-            orderid_name = "_".join(set([i.split("_")[0] for i in result_dict.get("Order No.", [])]))
             for i in df.to_dict(orient="records"):
               orderid = i.get("purchase_order_no")
+              touched_ids.add(orderid)
               # orderid = orderid.split("_")[0]
-              order_details = {orderid: [{"sku": d["SKU"], "Qty": d["Qty."], "AWB": d["AWB"]} for d in final_output_dict if d["Sub Order No."].split("_")[0] == orderid]}
+              with stage("manifest"):
+                order_details = {orderid: [{"sku": d["SKU"], "Qty": d["Qty."], "AWB": d["AWB"], "sub_order_id": d["Sub Order No."]} for d in manifest_index.get(orderid, [])]}
               if not order_details[orderid]:
-                fitz_dict = extract_text_with_fitz(input_pdf, page_num, read_all=True)
-                fitz_dict = clean_dict(fitz_dict)
+                fitz_dict = extract_table_with_words(session, page_num)
+                path_used = "layout" if fitz_dict else "fitz"
+                fitz_dict = fitz_dict or clean_dict(extract_text_with_fitz(session, page_num, read_all=True))
                 if fitz_dict and len(fitz_dict["Qty"]) != len(list(filter(lambda x: re.search(r"^\d+$", x), fitz_dict["Qty"]))):
-                  camelot_dict = extract_text_with_camelot(input_pdf, page_num+1)
+                  path_used = "camelot"
+                  camelot_dict = extract_text_with_camelot(camelot_batch, page_num+1)
                   camelot_dict = clean_dict(camelot_dict)
                   camelot_dict["purchase_order_no"] = result_dict.get("purchase_order_no", None)
-                  camelot_dict["AWB"] = extract_text_with_fitz(input_pdf, page_num)["AWB"]
+                  camelot_dict["AWB"] = extract_text_with_fitz(session, page_num)["AWB"]
                   try:
                     final_df = pd.DataFrame(camelot_dict)
                   except Exception as e:
@@ -204,60 +269,252 @@ def split_pdf_custom(input_pdf, output_folder, final_output_dict, top_ratio=0.4)
                 # df_filtered = final_df[final_df['Order No.'].str.startswith(orderid)]
                 if not final_df.empty:
                   for i in final_df.to_dict(orient="records"):
-                    order_details[orderid].append({"sku":i["SKU"], "Qty":i["Qty"], "AWB":i["AWB"]})
+                    order_details[orderid].append({"sku":i["SKU"], "Qty":i["Qty"], "AWB":i["AWB"], "sub_order_id": str(i.get("Order No.") or "").strip() or None})
               if str(order_details[orderid][0].get("AWB")) != "nan":
-                order_pages[order_details[orderid][0]["AWB"]] = []
-                order_pages[order_details[orderid][0]["AWB"]].append(order_details[orderid])
+                if new_doc is None:
+                  if open_doc is not None:
+                    save_order_pdf(open_doc, sink, output_name, log, compact, order_id=order_pages[prev_awb].order_id, awb=prev_awb, first_page=order_start, pages=page_num - order_start)
+                    if exporter:
+                        exporter.write(order_pages[prev_awb])
+                    if journal:
+                        journal.commit(order_start, page_num, {awb: order_pages[awb] for awb in touched}, output_pdf_path, {"prev_awb": prev_awb}, touched_ids - {orderid})
+                        touched, touched_ids = set(), {orderid}
+                  order_start = page_num
+                  new_doc = fitz.open()  # Create a new PDF document
+                  add_cropped_label(new_doc, doc, page_num, top_ratio)
+                order_pages[order_details[orderid][0]["AWB"]] = OrderRecord(purchase_order_key(orderid), order_details[orderid][0]["AWB"], [page_num], order_details[orderid])
                 prev_awb = order_details[orderid][0].get("AWB", None)
-                order_details = {}
+                touched.add(prev_awb)
+              elif new_doc is None and open_doc is None:
+                # No order open yet in this range: the items belong to the previous range's last order, like its leading pages
+                leading_items += order_details[orderid][:1]
               else:
-                order_pages[prev_awb][0].append(order_details[orderid][0])
-                order_details = {} 
-              with open("logs/logfile_meesho.txt", "a+", encoding="utf-8") as log_file:
-                log_file.write(f"Order ID: {orderid}, SKU: {order_pages[prev_awb][0][0]["sku"]}, Qty: {order_pages[prev_awb][0][0]["Qty"]}\n")
-            output_pdf_path = os.path.join(output_folder, f"Order_{prev_awb}.pdf")
-            order_pages[prev_awb].append({"output_pdf_location" : output_pdf_path})
+                order_pages[prev_awb].add_items(order_details[orderid][:1])
+                touched.add(prev_awb)
+              log.write(f"Order ID: {orderid}, SKU: {order_details[orderid][0]['sku']}, Qty: {order_details[orderid][0]['Qty']}\n")
+              order_details = {}
+        if new_doc is not None:
+            output_name = f"Order_{prev_awb}.pdf"
+            output_pdf_path = sink.location(output_name)
+            order_pages[prev_awb].output_path = output_pdf_path
             print(prev_awb)
             # order_pages[orderid].append({"output_pdf_location" : output_pdf_path})
-            new_doc.save(output_pdf_path)
-            with open("logs/logfile_meesho.txt", "a+", encoding="utf-8") as log_file:
-              log_file.write(f"✅ Split PDF saved as: {output_pdf_path}\n")
-              log_file.write("-" * 50 + "\n")
+            open_doc = new_doc
+        elif output_pdf_path is None:
+            leading_pages.append(page_num)
+            log.record(page=page_num, order_id=None, awb=None, path="continuation", duration=round(time.perf_counter() - page_started, 4))
+            continue
         else:
-            new_doc = fitz.open(output_pdf_path)
-            new_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
-            new_doc.insert_page(-1) 
-            with open("logs/logfile_meesho.txt", "a+", encoding="utf-8") as log_file:
-              log_file.write(f"❌ Order ID not found in the page {page_num}. Hence concatenating it with previous pdf.\n")
-            output_pdf_path_temp = os.path.join(output_folder, f"Order_{orderid_name}_temp.pdf")
-            new_doc.save(output_pdf_path_temp)
-            os.remove(output_pdf_path)
-            os.rename(output_pdf_path_temp, output_pdf_path)
-        new_doc.close()
-        
-    return order_pages
+            # No order id, or only orders without an AWB in the manifest: more pages of the open order
+            path_used = path_used if label else "continuation"
+            order_pages[prev_awb].pages.append(page_num)
+            open_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
+            open_doc.insert_page(-1) 
+            log.write(f"❌ Order ID not found in the page {page_num}. Hence concatenating it with previous pdf.\n")
+        log.record(page=page_num, order_id=orderid, awb=prev_awb, path=path_used, duration=round(time.perf_counter() - page_started, 4))
+
+    kept = None
+    if open_doc is not None and keep_last:
+        # The next range may open with more pages of this order; the caller writes it after appending them
+        kept = {"name": output_name, "pdf": open_doc.tobytes(), "continuation": [], "entry": {"order_id": order_pages[prev_awb].order_id, "awb": prev_awb, "first_page": order_start, "pages": stop - order_start}}
+        open_doc.close()
+    elif open_doc is not None:
+        save_order_pdf(open_doc, sink, output_name, log, compact, order_id=order_pages[prev_awb].order_id, awb=prev_awb, first_page=order_start, pages=stop - order_start)
+        if journal:
+            journal.commit(order_start, stop, {awb: order_pages[awb] for awb in touched}, output_pdf_path, {"prev_awb": prev_awb}, touched_ids)
+
+    return {"start": start, "order_pages": order_pages, "leading_pages": leading_pages, "leading_items": leading_items, "last_output": output_pdf_path, "kept": kept, "state": {"prev_awb": prev_awb}, "exported": exporter is not None}
+
+@timed("save")
+def append_continuation_pages(session, output_pdf_path, page_nums, log, compact=True):
+    """Appends continuation pages (each followed by a blank page) to an already saved order PDF."""
+    new_doc = fitz.open(output_pdf_path)
+    for page_num in page_nums:
+        new_doc.insert_pdf(session.doc, from_page=page_num, to_page=page_num)
+        new_doc.insert_page(-1)
+    output_pdf_path_temp = output_pdf_path.replace(".pdf", "_temp.pdf")
+    new_doc.save(output_pdf_path_temp, **(COMPACT_SAVE if compact else {}))
+    new_doc.close()
+    os.replace(output_pdf_path_temp, output_pdf_path)
+    log.write(f"❌ Order ID not found in the pages {page_nums}. Hence concatenating them with {output_pdf_path}.\n")
+
+def write_kept_order(session, sink, kept, log, compact=True):
+    """Writes an order split_page_range kept back (keep_last), with the continuation pages that opened the following ranges."""
+    new_doc = fitz.open(stream=kept["pdf"], filetype="pdf")
+    for page_num in kept["continuation"]:
+        new_doc.insert_pdf(session.doc, from_page=page_num, to_page=page_num)
+        new_doc.insert_page(-1)
+    save_order_pdf(new_doc, sink, kept["name"], log, compact, **dict(kept["entry"], pages=kept["entry"]["pages"] + len(kept["continuation"])))
 
-def excel_to_dataframe(file_path):
+_worker_session = None
+_worker_index = None
+_worker_log = None
+_worker_journal = None
+_worker_stats = None
+
+def _init_worker(input_pdf, manifest_index, output_folder):
+    """Process pool initializer: every worker keeps its own document handle, log, journal handle and stage timings."""
+    global _worker_session, _worker_index, _worker_log, _worker_journal, _worker_stats
+    _worker_session = PdfSession(input_pdf)
+    _worker_index = manifest_index
+    _worker_log = RunLog("meesho")
+    _worker_journal = CheckpointJournal(output_folder, input_pdf).reopen()
+    _worker_stats = RunStats("meesho").start()
+
+def _split_shard(sink_spec, top_ratio, start, stop, state, compact):
+    sink_class, args = sink_spec
+    shard_sink = sink_class(*args)  # the output folder, or a part archive the parent absorbs in page order
+    try:
+        result = split_page_range(_worker_session, shard_sink, _worker_index, top_ratio, start, stop, _worker_log, _worker_journal, state, compact, keep_last=not shard_sink.reusable)
+    finally:
+        _worker_log.flush()  # the worker's log stays open for its next shard
+    shard_sink.close()
+    result["part"] = None if shard_sink.reusable else shard_sink.file_path
+    result["stats"] = _worker_stats.drain()  # merged into the run report by the parent
+    return result
+
+def split_pdf_custom(input_pdf, output_folder, final_output_dict, top_ratio=0.4, workers=None, shard_size=None, resume=True, incremental=True, profile=False, compact=True, sink=None, exporter=None, label_index=LABEL_INDEX):
     """
-    Reads a tab-delimited .txt file and converts it to a Pandas DataFrame.
-    :param file_path: Path to the .txt file
-    :return: Pandas DataFrame
+    Splits a PDF page into two parts based on a custom split ratio.
+
+    :param input_pdf: Path to the input PDF file
+    :param top_ratio: Fraction of the page height for the top part (default is 40%)
+    :param workers: Number of processes to shard the page range across (None runs in-process)
+    :param shard_size: Pages per shard in parallel mode (default splits the range evenly across workers)
+    :param resume: Continue an interrupted run from the checkpoint journal next to output_folder (False starts over)
+    :param incremental: Keep the orders a previous run wrote from the same pages and manifest rows instead of splitting them again
+    :param profile: Also write a cProfile dump next to the run report (logs/profile_meesho.prof)
+    :param compact: Save the order PDFs with COMPACT_SAVE (garbage collection, deflate, dedup, object streams)
+    :param sink: Output sink from surya.sink (default: loose files in output_folder); archive sinks always split every page
+    :param exporter: Optional OrderExporter receiving each order once it is final
+    :param label_index: SQLite label index (LabelIndex) the written orders are added to at the end, None to skip
     """
-    df = pd.read_excel(file_path)
-    return df
+    stats = RunStats("meesho", profile=profile).start()
+    sink = sink or DirectorySink(output_folder)
+    resume = resume and sink.reusable
+    incremental = incremental and sink.reusable
+    session = PdfSession(input_pdf)  # Open the input PDF once for the whole run
+    manifest_index = build_order_index(final_output_dict, "Sub Order No.", normalize=purchase_order_key)
+    page_count = len(session)
+    log = RunLog("meesho")
+    try:
+
+        journal, segments, fingerprints = open_checkpoint(output_folder, input_pdf, session.doc, manifest_index, {"top_ratio": top_ratio, "table": "words"}, log, resume, incremental)
+        restored_pages = {}
+        segment_results = []
+        for segment in sorted(segments, key=lambda segment: segment["pages"][0]):
+            records = dict(segment_records(segment))
+            if not records:  # continuation pages committed after the order they belong to
+                for record in restored_pages.values():
+                    if record.output_path == segment["output"]:
+                        record.pages.extend(range(*segment["pages"]))
+            for key in [key for key in records if key in restored_pages and restored_pages[key].output_path == records[key].output_path]:
+                # the same order committed again with the items of its leading pages
+                restored_pages[key].pages.extend(records[key].pages)
+                restored_pages[key].items = records.pop(key).items
+            restored_pages.update(records)
+            segment_results.append({"start": segment["pages"][0], "order_pages": records, "leading_pages": [], "last_output": segment["output"], "state": segment["state"]})
+        states = {segment["pages"][1]: segment["state"] for segment in segments}
+
+        def resume_state(start):
+            prev_awb = states.get(start, {}).get("prev_awb")
+            return {"prev_awb": prev_awb, "order_pages": {prev_awb: restored_pages[prev_awb]}} if prev_awb in restored_pages else None
+
+        # Merge shards in page order; continuation pages opening a shard belong to the previous shard's last order
+        order_pages = {}
+        last_output = None
+        last_state = {}
+        kept = None  # archive sinks: last order of the previous range, written once the next range starts a new order
+        pending = None  # last order merged so far, exported once the next range has added its continuation pages
+
+        def merge(result):
+            nonlocal last_output, last_state, kept, pending
+            if "stats" in result:
+                stats.merge(result.pop("stats"))
+            previous = order_pages.get(last_state.get("prev_awb"))
+            leading_items = result.get("leading_items", [])
+            if result["leading_pages"] and previous is not None:
+                previous.pages.extend(result["leading_pages"])
+                previous.add_items(leading_items)
+            if result["leading_pages"] and kept:
+                kept["continuation"] += result["leading_pages"]
+            elif result["leading_pages"] and last_output:
+                append_continuation_pages(session, last_output, result["leading_pages"], log, compact)
+                # with items the whole order is committed again, and restored over the earlier commit
+                journal.commit(result["leading_pages"][0], result["leading_pages"][-1] + 1, {last_state["prev_awb"]: previous} if leading_items and previous is not None else None, last_output, last_state)
+            elif result["leading_pages"]:
+                log.write(f"No order found before pages {result['leading_pages']}, skipping them\n")
+            if kept and result["last_output"]:
+                write_kept_order(session, sink, kept, log, compact)
+                kept = None
+            if result.get("part"):
+                sink.absorb(result["part"])
+            kept = result.get("kept") or kept
+            last_record = result["order_pages"].get(result["state"].get("prev_awb"))
+            if exporter and last_record is not None and last_record.pages[0] >= result["start"]:
+                if pending is not None:
+                    exporter.write(pending)
+                if not result.get("exported"):
+                    for record in result["order_pages"].values():
+                        if record is not last_record and record.pages[0] >= result["start"]:
+                            exporter.write(record)
+                pending = last_record
+            order_pages.update(result["order_pages"])
+            last_output = result["last_output"] or last_output
+            last_state = result["state"] if result["last_output"] else last_state
+
+        # Ranges are merged as soon as they and every range before them are split, while later shards still run
+        ranges = remaining_ranges(segments, 0, page_count)
+        if not workers or workers == 1:
+            for result in heapq.merge(segment_results, (split_page_range(session, sink, manifest_index, top_ratio, start, stop, log, journal, resume_state(start), compact, keep_last=not sink.reusable, exporter=exporter) for start, stop in ranges), key=lambda result: result["start"]):
+                merge(result)
+        else:
+            shard_size = shard_size or max(1, -(-sum(stop - start for start, stop in ranges) // workers))
+            shards = [(start, min(start + shard_size, stop)) for range_start, stop in ranges for start in range(range_start, stop, shard_size)]
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(input_pdf, manifest_index, output_folder)) as pool:
+                futures = [pool.submit(_split_shard, sink.part_spec(start), top_ratio, start, stop, resume_state(start), compact) for start, stop in shards]
+                for result in heapq.merge(segment_results, (future.result() for future in futures), key=lambda result: result["start"]):
+                    merge(result)
+        if kept:
+            write_kept_order(session, sink, kept, log, compact)
+        if pending is not None:
+            exporter.write(pending)
+        if fingerprints:
+            fingerprints.remember_segments(journal.load())
+            fingerprints.save()
+        journal.complete()
+    finally:
+        log.close()
+    session.close()
+    if label_index:
+        index_orders(label_index, "meesho", order_pages, input_pdf)
+    stats.finish()
+
+    return order_pages
+
+REQUIRED_COLUMNS = ["Sub Order No.", "AWB", "SKU", "Qty."]
+MANIFEST_DTYPES = {"Sub Order No.": str, "AWB": str, "SKU": str}
 
 def grab_required_fields(data):
-    required_columns = ["Sub Order No.", "AWB", "SKU", "Qty."]  # Replace with actual column names
-    filtered_data = [{col: row[col] for col in required_columns if col in row} for row in data]
+    filtered_data = [{col: row[col] for col in REQUIRED_COLUMNS if col in row} for row in data]
     updated_data_list = data = [{**item, "Sub Order No.": item["Sub Order No."].replace("\n", "")} for item in filtered_data]
     return updated_data_list
 
+def load_manifest(file_path):
+    """Order export (.xlsx) rows with only REQUIRED_COLUMNS, read through the columnar manifest cache."""
+    return grab_required_fields(manifest_rows(file_path, REQUIRED_COLUMNS, MANIFEST_DTYPES))
+
+def run(pdf_path, file_path, output_folder, top_ratio=0.345, workers=None, profile=False, **outputs):
+    """
+    Split one Meesho label PDF using its order export (.xlsx), starting a fresh run log.
+    :param workers: Number of processes to shard the pages across (None splits in this process)
+    :param outputs: pick_batches, archive, export and label_index, see surya.pipeline.run_split
+    """
+    final_output_dict = load_manifest(file_path)
+    return run_split("meesho", split_pdf_custom, pdf_path, output_folder, final_output_dict, cropped=True, top_ratio=top_ratio, workers=workers, profile=profile, **outputs)
+
 # Example Usage (30% top, 70% bottom)
 if __name__ == "__main__":
     file_path = "meesho_final_integrate/meesho.xlsx"  # Replace with the actual file path
-    df = excel_to_dataframe(file_path)
-    final_output_dict = grab_required_fields(df.to_dict(orient="records"))
     output_folder = "outputs/meesho_output_pdfs"  # Folder to save separated PDFs
-    with open("logs/logfile_meesho.txt", "w+", encoding="utf-8") as log_file:
-      log_file.write(f"Starting the log for mentioned time:{datetime.today().strftime("%Y-%m-%d %H:%M:%S")}\n")
-    op = split_pdf_custom("meesho_final_integrate/meesho.pdf", output_folder, final_output_dict, top_ratio=0.345)
\ No newline at end of file
+    op = run("meesho_final_integrate/meesho.pdf", file_path, output_folder)
\ No newline at end of file
@@ -0,0 +1,81 @@
+import os, sys, time, argparse
+
+from surya.registry import MARKETPLACES, load_splitter, detect_marketplace
+from surya.label_index import LABEL_INDEX, LabelIndex
+
+
+def split(args):
+    if not args.marketplace and not args.manifest:
+        raise SystemExit("split: give --marketplace, or --manifest to detect it from")
+    marketplace = args.marketplace or detect_marketplace(args.manifest)
+    entry = MARKETPLACES[marketplace]
+    pdf_path = args.pdf or entry["pdf_path"]
+    file_path = args.manifest or entry["file_path"]
+    if args.workers and not entry["sharded"]:
+        raise SystemExit(f"split: --workers is not supported for {marketplace}")
+    options = {"workers": args.workers} if args.workers else {}
+    output_folder = args.output_folder or os.path.join("outputs", f"{marketplace}_output_pdfs")
+    started = time.perf_counter()
+    order_pages = load_splitter(marketplace).run(pdf_path, file_path, output_folder, profile=args.profile, pick_batches=args.pick_batches, archive=args.archive, export=args.export, label_index=args.label_index, **options)
+    destination = output_folder.rstrip("/\\") + "." + args.archive if args.archive else output_folder
+    print(f"{len(order_pages)} {marketplace} orders written to {destination} in {time.perf_counter() - started:.1f}s (stage timings: logs/report_{marketplace}.json)")
+
+
+def lookup(args):
+    label_index = LabelIndex(args.index)
+    codes = args.codes or (line.strip() for line in sys.stdin)  # a scanner gun types one code per line
+    try:
+        for code in codes:
+            if not code:
+                continue
+            started = time.perf_counter()
+            rows = label_index.by_sku(code) if args.sku else label_index.lookup(code)
+            for row in rows:
+                print(f"{code}\t{row['marketplace']}\t{row['order_id']}\t{row['awb']}\t{row['sku']}\tpages {row['pages']}\t{row['output_path']}")
+            if not rows:
+                print(f"{code}\tnot found")
+            print(f"{len(rows)} label(s) in {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+    finally:
+        label_index.close()
+
+
+def watch(args):
+    from surya.watch import InboxWatcher
+    InboxWatcher(args.inbox, args.output_root, args.interval).run_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m surya", description="Split marketplace shipping-label PDFs into one PDF per order.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    split_parser = commands.add_parser("split", help="Split one label PDF")
+    split_parser.add_argument("--marketplace", choices=sorted(MARKETPLACES), help="Detected from the manifest columns when left out")
+    split_parser.add_argument("--pdf", help="Label PDF (default: the marketplace's sample file)")
+    split_parser.add_argument("--manifest", help="Order export .xlsx/.csv/.txt (default: the marketplace's sample file)")
+    split_parser.add_argument("--output-folder", help="Default: outputs/<marketplace>_output_pdfs")
+    split_parser.add_argument("--archive", choices=["zip", "tar"], help="Stream the orders into one <output-folder>.zip/.tar with an index.csv instead of loose files")
+    split_parser.add_argument("--export", help="Stream every finished order (order id, SKU, qty, AWB, pages, output) to this .jsonl, .csv or .parquet file")
+    split_parser.add_argument("--label-index", default=LABEL_INDEX, help=f"SQLite index the written labels are added to (default: {LABEL_INDEX}); pass an empty value to skip")
+    split_parser.add_argument("--workers", type=int, help="Split page shards in this many processes (Meesho; default: one process)")
+    split_parser.add_argument("--pick-batches", action="store_true", help="Also write print batches sorted by SKU and quantity to <output-folder>/pick_batches")
+    split_parser.add_argument("--profile", action="store_true", help="Also write a cProfile dump to logs/profile_<marketplace>.prof")
+    split_parser.set_defaults(handler=split)
+
+    lookup_parser = commands.add_parser("lookup", help="Find the labels of scanned AWBs, order ids or sub-order ids in the label index")
+    lookup_parser.add_argument("codes", nargs="*", help="Codes to resolve; read one per line from stdin when left out")
+    lookup_parser.add_argument("--index", default=LABEL_INDEX, help=f"SQLite label index (default: {LABEL_INDEX})")
+    lookup_parser.add_argument("--sku", action="store_true", help="Treat the codes as SKUs and list every label with them")
+    lookup_parser.set_defaults(handler=lookup)
+
+    watch_parser = commands.add_parser("watch", help="Split label PDFs as they arrive in an inbox folder")
+    watch_parser.add_argument("inbox", help="Folder receiving <name>.pdf together with its order export <name>.xlsx/.csv/.txt")
+    watch_parser.add_argument("--output-root", default="outputs", help="Folder receiving the <marketplace>_output_pdfs folders")
+    watch_parser.add_argument("--interval", type=float, default=2.0, help="Seconds between polls")
+    watch_parser.set_defaults(handler=watch)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import os, csv
+import fitz  # PyMuPDF
+
+from surya.writer import page_ranges, COMPACT_SAVE
+from surya.stats import timed
+from surya.sink import OutputReader
+
+MIXED = "~MIXED"  # group of orders with more than one SKU (or none read), printed after the single-SKU groups
+
+
+def _quantity(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def pick_order(order_pages):
+    """
+    Orders in pick order: grouped by SKU, then by quantity, with multi-SKU and unread orders last.
+    :return: list of (sku, qty, orderid, awb, OrderRecord)
+    """
+    picks = []
+    for orderid, record in order_pages.items():
+        skus = {str(item.sku) for item in record.items}
+        sku = skus.pop() if len(skus) == 1 else MIXED
+        qty = sum(_quantity(item.qty) for item in record.items)
+        picks.append((sku, qty, str(orderid), record.awb, record))
+    return sorted(picks, key=lambda pick: (pick[0] == MIXED, pick[0], pick[1], pick[2]))
+
+
+@timed("batches")
+def write_pick_batches(order_pages, output_folder, source_pdf=None, batch_pages=500, cropped=False):
+    """
+    Merge the orders into a few print batches sorted by SKU and quantity, next to
+    the per-order files: output_folder/pick_batches/Batch_001.pdf, ... plus
+    pick_list.csv telling which batch page each order starts on. Orders written
+    as plain page copies (Amazon, FirstCry) are copied straight from the source
+    document; cropped orders (Meesho, Flipkart) from their output file or archive
+    member.
+    :param source_pdf: Label PDF the orders were split from
+    :param batch_pages: A new batch starts once a batch would grow past this many pages
+    :param cropped: The order files are cropped labels rather than page copies, so they are read from the output
+    :return: Paths of the batch PDFs
+    """
+    batch_folder = os.path.join(output_folder, "pick_batches")
+    os.makedirs(batch_folder, exist_ok=True)
+    for name in os.listdir(batch_folder):
+        if name.startswith("Batch_"):
+            os.remove(os.path.join(batch_folder, name))  # a previous run may have written more batches
+    source = fitz.open(source_pdf) if source_pdf else None
+    outputs = OutputReader()
+    batches = []
+    batch = None
+    rows = []
+
+    def close_batch():
+        path = os.path.join(batch_folder, f"Batch_{len(batches) + 1:03d}.pdf")
+        batch.save(path, **COMPACT_SAVE)  # merges the fonts and images repeated across order files
+        batch.close()
+        batches.append(path)
+
+    for sku, qty, orderid, awb, record in pick_order(order_pages):
+        if record.pages and source is not None and not cropped:
+            order_doc, ranges = source, page_ranges(sorted(record.pages))
+        elif record.output_path and (order_doc := outputs.open(record.output_path)) is not None:
+            ranges = [(0, len(order_doc) - 1)]
+        else:
+            continue
+        length = sum(last - first + 1 for first, last in ranges)
+        if batch is not None and len(batch) + length > batch_pages:
+            close_batch()
+            batch = None
+        if batch is None:
+            batch = fitz.open()
+        rows.append({"batch": len(batches) + 1, "page": len(batch) + 1, "sku": "" if sku == MIXED else sku, "qty": qty, "order_id": orderid, "awb": awb})
+        for first, last in ranges:
+            batch.insert_pdf(order_doc, from_page=first, to_page=last)
+        if order_doc is not source:
+            order_doc.close()
+    if batch is not None:
+        close_batch()
+    if source is not None:
+        source.close()
+    outputs.close()
+
+    with open(os.path.join(batch_folder, "pick_list.csv"), "w", newline="", encoding="utf-8") as pick_list:
+        writer = csv.DictWriter(pick_list, fieldnames=["batch", "page", "sku", "qty", "order_id", "awb"])
+        writer.writeheader()
+        writer.writerows(rows)
+    return batches
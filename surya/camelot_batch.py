@@ -0,0 +1,40 @@
+from surya.stats import timed
+
+
+@timed("camelot.read_pdf")
+def _read_pdf(pdf_path, pages, **read_kwargs):
+    import camelot  # slow to import; only loaded once a page actually needs the table fallback
+    return camelot.read_pdf(pdf_path, pages=pages, **read_kwargs)
+
+
+class CamelotBatch:
+    """
+    Two-phase camelot fallback: collect every page that needs table extraction,
+    then read them with one read_pdf call per chunk instead of one per page.
+    :param pdf_path: Path to the input PDF file
+    :param chunk_size: Maximum number of pages handed to a single read_pdf call
+    :param read_kwargs: Extra arguments for camelot.read_pdf (flavor, parallel, ...)
+    """
+
+    def __init__(self, pdf_path, chunk_size=50, **read_kwargs):
+        self.pdf_path = pdf_path
+        self.chunk_size = chunk_size
+        self.read_kwargs = read_kwargs
+        self._tables = {}
+
+    def prefetch(self, page_numbers):
+        """Read the tables of all 1-based page_numbers not fetched yet, chunk by chunk."""
+        pending = sorted(set(p for p in page_numbers if p not in self._tables))
+        for i in range(0, len(pending), self.chunk_size):
+            chunk = pending[i:i + self.chunk_size]
+            for page_number in chunk:
+                self._tables[page_number] = []
+            tables = _read_pdf(self.pdf_path, ",".join(map(str, chunk)), **self.read_kwargs)
+            for table in tables:
+                self._tables[int(table.page)].append(table)
+
+    def tables(self, page_number):
+        """Tables found on a 1-based page, in camelot order; reads the page on its own if it was not prefetched."""
+        if page_number not in self._tables:
+            self._tables[page_number] = list(_read_pdf(self.pdf_path, str(page_number), **self.read_kwargs))
+        return self._tables[page_number]
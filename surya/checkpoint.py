@@ -0,0 +1,126 @@
+import os, json
+
+from surya.fingerprint import FingerprintStore
+
+
+def _to_json(value):
+    """json.dumps fallback for OrderRecords and numpy scalars coming out of the manifest DataFrame."""
+    if hasattr(value, "to_json"):
+        return value.to_json()
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+class CheckpointJournal:
+    """
+    Append-only JSONL journal kept next to the output folder so an interrupted
+    split can resume instead of starting over. Every saved order commits the
+    page range it covered, its order_pages entries, the written file and the
+    loop state needed to continue (e.g. prev_awb). A journal belonging to a
+    different input file, or to a run that finished, is started afresh.
+    :param output_folder: Folder the splitter writes into
+    :param input_pdf: Path to the input PDF file
+    """
+
+    def __init__(self, output_folder, input_pdf):
+        self.path = output_folder.rstrip("/\\") + ".checkpoint.jsonl"
+        stat = os.stat(input_pdf)
+        self.header = {"input": os.path.abspath(input_pdf), "size": stat.st_size, "mtime": stat.st_mtime}
+        self._file = None
+
+    def load(self):
+        """
+        Read back the committed segments of an unfinished run of the same input.
+        :return: list of {"pages": [first, next], "order_pages": [[key, entries], ...], "output": path, "state": {...}, "ids": [...]}
+        """
+        if not os.path.exists(self.path):
+            return []
+        lines = []
+        with open(self.path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    lines.append(json.loads(line))
+                except ValueError:  # a commit torn by a crash mid-write
+                    continue
+        if not lines or lines[0] != self.header or lines[-1].get("complete"):
+            return []
+        return lines[1:]
+
+    def open(self, resume=True):
+        """Start appending; without resume (or with nothing to resume) the journal is truncated first."""
+        if resume and self.load():
+            with open(self.path, "rb+") as journal:
+                journal.truncate(journal.read().rfind(b"\n") + 1)  # cut a torn last commit, so the next one starts on its own line
+            self._file = open(self.path, "a", encoding="utf-8")
+        else:
+            with open(self.path, "w", encoding="utf-8") as journal:
+                journal.write(json.dumps(self.header) + "\n")
+            self._file = open(self.path, "a", encoding="utf-8")  # append mode, like the worker handles, so no commit overwrites another
+        return self
+
+    def reopen(self):
+        """Append-only handle for worker processes; the header is already written by the parent."""
+        self._file = open(self.path, "a", encoding="utf-8")
+        return self
+
+    def commit(self, first, next_page, order_pages=None, output=None, state=None, ids=()):
+        """Record that pages [first, next_page) are done and their output is on disk; ids are the manifest keys looked up."""
+        self._write({
+            "pages": [first, next_page],
+            "order_pages": [[key, value] for key, value in (order_pages or {}).items()],
+            "output": output,
+            "state": state or {},
+            "ids": list(ids),
+        })
+
+    def complete(self):
+        self._write({"complete": True})
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, default=_to_json) + "\n")
+        self._file.flush()
+
+
+def remaining_ranges(segments, start, stop):
+    """Page ranges in [start, stop) not covered by any committed segment."""
+    ranges = []
+    cursor = start
+    for first, next_page in sorted(segment["pages"] for segment in segments):
+        if first > cursor:
+            ranges.append((cursor, min(first, stop)))
+        cursor = max(cursor, next_page)
+    if cursor < stop:
+        ranges.append((cursor, stop))
+    return ranges
+
+
+def open_checkpoint(output_folder, input_pdf, doc, manifest_index, options, log, resume=True, incremental=True):
+    """
+    Open the checkpoint journal of a split and collect the segments that need no splitting.
+    :param doc: fitz document of input_pdf
+    :param options: Split options that change the output, part of every fingerprint (FingerprintStore)
+    :param log: RunLog of the split
+    :param resume: Keep the orders an interrupted run committed
+    :param incremental: Keep the orders a previous run wrote from unchanged pages and manifest rows
+    :return: (journal, segments already done, FingerprintStore or None)
+    """
+    # Orders committed by an interrupted run are restored as they were; only the remaining pages are split again
+    journal = CheckpointJournal(output_folder, input_pdf)
+    segments = journal.load() if resume else []
+    journal.open(resume)
+    if segments:
+        log.write(f"Resuming from checkpoint {journal.path}: {len(segments)} orders already split\n")
+    # Orders a previous run wrote from the same pages and manifest rows are kept without re-extracting them
+    fingerprints = FingerprintStore(output_folder, doc, manifest_index, options) if incremental else None
+    if fingerprints:
+        unchanged = fingerprints.reusable_segments(remaining_ranges(segments, 0, len(doc)))
+        for segment in unchanged:
+            journal.commit(*segment["pages"], dict(segment["order_pages"]), segment["output"], segment["state"], segment["ids"])
+        segments += unchanged
+        log.write(f"{len(unchanged)} orders unchanged since the last run, keeping their output\n")
+    return journal, segments, fingerprints
@@ -0,0 +1,43 @@
+import fitz  # PyMuPDF
+
+
+class PdfSession:
+    """
+    Keeps one PDF open for a whole run and memoizes per-page text and words.
+    :param path: Path to the input PDF file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.doc = fitz.open(path)
+        self._text = {}
+        self._words = {}
+
+    def __len__(self):
+        return len(self.doc)
+
+    def __getitem__(self, page_num):
+        return self.doc[page_num]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def text(self, page_num):
+        """Return page.get_text("text") for a 0-based page, parsing it only once."""
+        if page_num not in self._text:
+            self._text[page_num] = self.doc[page_num].get_text("text")
+        return self._text[page_num]
+
+    def words(self, page_num):
+        """Return page.get_text("words") (x0, y0, x1, y1, text, ...) tuples for a 0-based page, parsing them only once."""
+        if page_num not in self._words:
+            self._words[page_num] = self.doc[page_num].get_text("words")
+        return self._words[page_num]
+
+    def close(self):
+        self._text.clear()
+        self._words.clear()
+        self.doc.close()
@@ -0,0 +1,93 @@
+import os, csv, json
+
+from surya.stats import timed
+
+EXPORT_COLUMNS = ["marketplace", "order_id", "sku", "qty", "awb", "pages", "output_path"]
+EXPORT_FORMATS = (".jsonl", ".csv", ".parquet")
+
+
+def _quantity(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+class OrderExporter:
+    """
+    Streams every finished order of a run to one file, a row per line item
+    (marketplace, order id, sku, qty, AWB, source pages, output path), as soon as
+    the splitter finalizes it. JSONL and CSV rows are flushed order by order, so
+    reconciliation can tail the file during the run; Parquet (needs pyarrow) is
+    written in row groups. Only the pending row group is held in memory. An
+    order written again, e.g. an Amazon order that gained pages after it was
+    emitted, appears again and its last rows win.
+    :param path: .jsonl, .csv or .parquet file, overwritten
+    :param marketplace: Value of the marketplace column
+    :param row_group_size: Parquet rows buffered per row group
+    """
+
+    def __init__(self, path, marketplace, row_group_size=10_000):
+        self.format = os.path.splitext(path)[1].lower()
+        if self.format not in EXPORT_FORMATS:
+            raise ValueError(f"Cannot export orders to {path}, expected one of {', '.join(EXPORT_FORMATS)}")
+        self.path = path
+        self.marketplace = marketplace
+        self.row_group_size = row_group_size
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        if self.format == ".parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            self._schema = pa.schema([(column, pa.list_(pa.int32()) if column == "pages" else pa.int64() if column == "qty" else pa.string()) for column in EXPORT_COLUMNS])
+            self._writer = pq.ParquetWriter(path, self._schema)
+            self._rows = []
+        else:
+            self._file = open(path, "w", newline="", encoding="utf-8")
+            if self.format == ".csv":
+                self._csv = csv.DictWriter(self._file, fieldnames=EXPORT_COLUMNS)
+                self._csv.writeheader()
+                self._file.flush()
+
+    def rows(self, record):
+        """Export rows of one OrderRecord; an order without line items still gets one row."""
+        base = {"marketplace": self.marketplace, "order_id": _text(record.order_id)}
+        pages = list(record.pages)
+        output_path = record.output_path
+        return [
+            {**base, "sku": _text(item.sku), "qty": _quantity(item.qty), "awb": _text(item.awb or record.awb), "pages": pages, "output_path": output_path}
+            for item in record.items
+        ] or [{**base, "sku": None, "qty": None, "awb": _text(record.awb), "pages": pages, "output_path": output_path}]
+
+    @timed("export")
+    def write(self, record):
+        """Export one finalized OrderRecord."""
+        rows = self.rows(record)
+        if self.format == ".jsonl":
+            self._file.write("".join(json.dumps(row) + "\n" for row in rows))
+            self._file.flush()
+        elif self.format == ".csv":
+            self._csv.writerows({**row, "pages": " ".join(map(str, row["pages"]))} for row in rows)
+            self._file.flush()
+        else:
+            self._rows += rows
+            if len(self._rows) >= self.row_group_size:
+                self._write_row_group()
+
+    def _write_row_group(self):
+        import pyarrow as pa
+        self._writer.write_table(pa.Table.from_pylist(self._rows, schema=self._schema))
+        self._rows = []
+
+    def close(self):
+        if self.format == ".parquet":
+            if self._rows:
+                self._write_row_group()
+            self._writer.close()
+        else:
+            self._file.close()
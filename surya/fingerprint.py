@@ -0,0 +1,135 @@
+import os, json, hashlib
+
+
+def page_digest(doc, page_num):
+    """Content hash of one page: its content streams plus the raw streams of the images it draws."""
+    page = doc[page_num]
+    digest = hashlib.blake2b(page.read_contents(), digest_size=16)
+    for image in page.get_images():
+        digest.update(doc.xref_stream_raw(image[0]) or b"")
+    return digest.hexdigest()
+
+
+def rows_digest(rows):
+    """Content hash of manifest rows, independent of dict key order."""
+    return hashlib.blake2b(json.dumps(rows, sort_keys=True, default=str).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class FingerprintStore:
+    """
+    Remembers which page and manifest-row fingerprints produced which output
+    file, in <output_folder>.fingerprints.json, so a rerun of the same PDF only
+    extracts and writes the orders whose pages or manifest rows changed. It
+    also caches slow per-page extraction results (OCR text, camelot rows) by
+    page fingerprint. Everything recorded by a run with different params is ignored.
+    :param output_folder: Folder the splitter writes into
+    :param doc: Open fitz document being split
+    :param manifest_index: Order id -> manifest rows, as built by build_order_index
+    :param params: Split settings the outputs depend on, e.g. {"top_ratio": 0.4}
+    """
+
+    def __init__(self, output_folder, doc, manifest_index, params=None):
+        self.path = output_folder.rstrip("/\\") + ".fingerprints.json"
+        self.doc = doc
+        self.manifest_index = manifest_index
+        self.params = json.loads(json.dumps(params or {}))
+        self.outputs = {}  # output path -> record, rebuilt by every run
+        self.pages = {}    # page fingerprint -> cached extraction results, rebuilt by every run
+        self._previous = {"outputs": {}, "pages": {}}
+        self._digests = {}
+        try:
+            with open(self.path, encoding="utf-8") as store:
+                previous = json.load(store)
+        except (OSError, ValueError):  # no store yet, or one cut short: nothing to reuse
+            previous = {}
+        if previous.get("params") == self.params:
+            self._previous = previous
+
+    def page(self, page_num):
+        if page_num not in self._digests:
+            self._digests[page_num] = page_digest(self.doc, page_num)
+        return self._digests[page_num]
+
+    def order_key(self, page_nums, ids, next_page=None):
+        """
+        Fingerprint of everything one output file is built from. next_page is the
+        page after a contiguous order, pinning where the next order started.
+        """
+        return {
+            "pages": [self.page(page_num) for page_num in page_nums],
+            "next": self.page(next_page) if next_page is not None and next_page < len(self.doc) else None,
+            "rows": rows_digest([self.manifest_index.get(orderid, []) for orderid in ids]),
+        }
+
+    def unchanged(self, output, page_nums, ids):
+        """True when output was written by a previous run from the same pages and manifest rows and still exists."""
+        record = self._previous["outputs"].get(output)
+        return record is not None and os.path.exists(output) and record["key"] == self.order_key(page_nums, ids)
+
+    def remember(self, output, page_nums, ids, next_page=None, **extra):
+        self.outputs[output] = {"key": self.order_key(page_nums, ids, next_page), "ids": list(ids), **extra}
+
+    def cached(self, page_num, kind):
+        """Result of a slow extraction step (kind: "ocr", "camelot", ...) for an unchanged page, or None."""
+        digest = self.page(page_num)
+        value = self._previous["pages"].get(digest, {}).get(kind)
+        if value is not None:
+            self.pages.setdefault(digest, {})[kind] = value
+        return value
+
+    def store(self, page_num, kind, value):
+        self.pages.setdefault(self.page(page_num), {})[kind] = value
+
+    def cached_call(self, page_num, kind, compute):
+        """compute() for a changed page, the stored result for an unchanged one; always a fresh copy."""
+        value = self.cached(page_num, kind)
+        if value is None:
+            value = compute()
+            self.store(page_num, kind, value)
+        return json.loads(json.dumps(value, default=str))
+
+    def reusable_segments(self, ranges):
+        """
+        Find orders of a previous run inside the given page ranges whose pages,
+        following page and manifest rows are unchanged, walking the current PDF
+        so orders that moved are still recognised.
+        :return: checkpoint-style segments {"pages", "order_pages", "output", "state", "ids"}
+        """
+        by_first_page = {}
+        for output, record in self._previous["outputs"].items():
+            if "order_pages" in record and os.path.exists(output):
+                by_first_page.setdefault(record["key"]["pages"][0], []).append((output, record))
+        segments = []
+        for start, stop in ranges:
+            page_num = start
+            while page_num < stop:
+                for output, record in by_first_page.get(self.page(page_num), []):
+                    next_page = page_num + len(record["key"]["pages"])
+                    if next_page <= stop and record["key"] == self.order_key(range(page_num, next_page), record["ids"], next_page):
+                        segments.append({"pages": [page_num, next_page], "order_pages": record["order_pages"], "output": output, "state": record["state"], "ids": record["ids"]})
+                        self.outputs[output] = record
+                        page_num = next_page
+                        break
+                else:
+                    page_num += 1
+        return segments
+
+    def remember_segments(self, segments):
+        """Record every output of a checkpoint journal, merging the segments that wrote the same file."""
+        by_output = {}
+        for segment in sorted(segments, key=lambda segment: segment["pages"][0]):
+            by_output.setdefault(segment["output"], []).append(segment)
+        for output, parts in by_output.items():
+            if any(part["pages"][0] != prev["pages"][1] for prev, part in zip(parts, parts[1:])):
+                continue  # not one contiguous run of pages, cannot be reused
+            order_pages, ids = {}, []
+            for part in parts:
+                order_pages.update((key, value) for key, value in part["order_pages"])
+                ids += [orderid for orderid in part.get("ids", []) if orderid not in ids]
+            first, next_page = parts[0]["pages"][0], parts[-1]["pages"][1]
+            self.remember(output, range(first, next_page), ids, next_page, order_pages=[[key, value] for key, value in order_pages.items()], state=parts[-1]["state"])
+
+    def save(self):
+        with open(self.path + ".tmp", "w", encoding="utf-8") as store:
+            json.dump({"params": self.params, "outputs": self.outputs, "pages": self.pages}, store, default=str)
+        os.replace(self.path + ".tmp", self.path)  # a crash mid-write leaves the previous store in place
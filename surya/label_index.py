@@ -0,0 +1,109 @@
+import os, time, sqlite3
+
+from surya.stats import timed
+
+LABEL_INDEX = os.path.join("outputs", "labels.sqlite")
+LABEL_COLUMNS = ["marketplace", "order_id", "sub_order_id", "awb", "sku", "qty", "output_path", "first_page", "pages", "source_pdf", "indexed_at"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS labels (
+    marketplace TEXT NOT NULL,
+    order_id TEXT,
+    sub_order_id TEXT,
+    awb TEXT,
+    sku TEXT,
+    qty TEXT,
+    output_path TEXT NOT NULL,
+    first_page INTEGER,
+    pages TEXT,
+    source_pdf TEXT,
+    indexed_at REAL
+);
+CREATE INDEX IF NOT EXISTS labels_awb ON labels (awb);
+CREATE INDEX IF NOT EXISTS labels_order_id ON labels (order_id);
+CREATE INDEX IF NOT EXISTS labels_sub_order_id ON labels (sub_order_id);
+CREATE INDEX IF NOT EXISTS labels_sku ON labels (sku);
+CREATE INDEX IF NOT EXISTS labels_output_path ON labels (output_path);
+"""
+
+
+def _text(value):
+    if value is None or value != value:  # missing cell or NaN
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+class LabelIndex:
+    """
+    Persistent SQLite index of every order label the splitters wrote, across runs
+    and marketplaces: one row per line item with its order id, sub-order id, AWB
+    and SKU (each indexed) pointing at the order's output_path (a file, or an
+    archive member <archive>::<name>) and its pages in the source PDF. Scanner
+    stations resolve a scanned code with lookup() in a few B-tree probes however
+    many orders are indexed. Splitting the same orders to the same output again
+    replaces their rows.
+    :param path: SQLite file, created with its tables on first use
+    """
+
+    def __init__(self, path=LABEL_INDEX):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30)  # a watcher and a CLI run may write at the same time
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")  # lookups keep reading while a run writes
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    @timed("label_index")
+    def add(self, marketplace, order_pages, source_pdf=None):
+        """
+        Index the written orders of one split in a single transaction.
+        :param order_pages: order_pages dict returned by a splitter (OrderRecord values); orders without an output are skipped
+        :param source_pdf: Label PDF the orders were split from
+        :return: Number of rows written
+        """
+        indexed_at = time.time()
+        records = [record for record in order_pages.values() if record.output_path]
+        rows = []
+        for record in records:
+            pages = sorted(record.pages)
+            base = (marketplace, _text(record.order_id))
+            tail = (record.output_path, pages[0] if pages else None, " ".join(map(str, pages)), source_pdf, indexed_at)
+            rows += [base + (_text(item.sub_order_id), _text(item.awb or record.awb), _text(item.sku), _text(item.qty)) + tail for item in record.items] \
+                or [base + (None, _text(record.awb), None, None) + tail]
+        with self._db:
+            self._db.executemany("DELETE FROM labels WHERE output_path = ?", ((record.output_path,) for record in records))
+            self._db.executemany(f"INSERT INTO labels ({', '.join(LABEL_COLUMNS)}) VALUES ({', '.join('?' * len(LABEL_COLUMNS))})", rows)
+        return len(rows)
+
+    def lookup(self, code):
+        """
+        Labels a scanned AWB, order id or sub-order id belongs to, newest first.
+        :return: list of dicts with LABEL_COLUMNS
+        """
+        code = _text(code)
+        rows = self._db.execute(
+            f"SELECT {', '.join(LABEL_COLUMNS)} FROM labels WHERE awb = ? OR order_id = ? OR sub_order_id = ? ORDER BY indexed_at DESC",
+            (code, code, code),
+        )
+        return [dict(row) for row in rows]
+
+    def by_sku(self, sku):
+        """Labels of every indexed order with this SKU, newest first."""
+        rows = self._db.execute(f"SELECT {', '.join(LABEL_COLUMNS)} FROM labels WHERE sku = ? ORDER BY indexed_at DESC", (_text(sku),))
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self._db.close()
+
+
+def index_orders(path, marketplace, order_pages, source_pdf=None):
+    """Add one split's orders to the label index at path (see LabelIndex.add)."""
+    label_index = LabelIndex(path)
+    try:
+        return label_index.add(marketplace, order_pages, source_pdf)
+    finally:
+        label_index.close()
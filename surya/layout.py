@@ -0,0 +1,88 @@
+import re
+
+# page.get_text("words") tuples: (x0, y0, x1, y1, text, block_no, line_no, word_no)
+X0, Y0, X1, Y1, TEXT = range(5)
+
+
+def visual_lines(words, tolerance=3):
+    """Group words into lines by vertical position (table cells on one row are separate blocks in the text layer), top to bottom."""
+    lines = []
+    for word in sorted(words, key=lambda word: ((word[Y0] + word[Y1]) / 2, word[X0])):
+        middle = (word[Y0] + word[Y1]) / 2
+        if lines and abs(middle - lines[-1][0]) <= tolerance:
+            lines[-1][1].append(word)
+        else:
+            lines.append([middle, [word]])
+    return [sorted(line, key=lambda word: word[X0]) for _, line in lines]
+
+
+def find_header(lines, labels):
+    """
+    Find the first line holding every column label, in order.
+    :param lines: visual_lines() of a page
+    :param labels: Column labels; a label may be several words ("Order No.")
+    :return: (index of the header line, {label: x where its column starts}), or (None, None)
+    """
+    for index, line in enumerate(lines):
+        texts = [word[TEXT] for word in line]
+        columns = {}
+        position = 0
+        for label in labels:
+            tokens = label.split()
+            start = next((i for i in range(position, len(texts) - len(tokens) + 1) if texts[i:i + len(tokens)] == tokens), None)
+            if start is None:
+                break
+            columns[label] = line[start][X0]
+            position = start + len(tokens)
+        else:
+            return index, columns
+    return None, None
+
+
+def _join(fragments):
+    """Join a cell's lines; a line ending in - or _ was wrapped inside a code (SKU-12-\\n3) and continues without a space."""
+    text = ""
+    for fragment in fragments:
+        text += fragment if not text or text.endswith(("-", "_")) else " " + fragment
+    return text
+
+
+def table_rows(lines, columns, anchor, pattern, stop=None, slack=6):
+    """
+    Rebuild table rows from the lines below a header by word x-positions. A row
+    starts on every line whose anchor column matches pattern (e.g. a quantity);
+    lines in between are wrapped cell text of the row above. The table ends at
+    a line starting with stop, a line starting left of the table, or a vertical
+    gap of more than two lines.
+    :param lines: visual_lines() after the header line
+    :param columns: {label: x where its column starts}, from find_header()
+    :param anchor: Label of a column that has a value on the first line of every row
+    :param pattern: Regex the anchor value must match
+    :param stop: Text that ends the table (e.g. "TAX INVOICE")
+    :param slack: Points a value may start left of its header
+    :return: list of {label: cell text} rows
+    """
+    order = sorted(columns, key=columns.get)
+    rows = []
+    previous_bottom = None
+    left = min(columns.values())
+    for line in lines:
+        line_text = " ".join(word[TEXT] for word in line)
+        height = line[0][Y1] - line[0][Y0]
+        if stop and line_text.startswith(stop):
+            break
+        if previous_bottom is not None and (line[0][Y0] - previous_bottom > 2 * height or line[0][X0] < left - slack):
+            break
+        cells = {}
+        for word in line:
+            label = next((label for label in reversed(order) if word[X0] >= columns[label] - slack), order[0])
+            cells.setdefault(label, []).append(word[TEXT])
+        if re.fullmatch(pattern, " ".join(cells.get(anchor, []))):
+            rows.append({label: [] for label in order})
+            left = min(left, line[0][X0])  # row numbers may sit left of the first header
+        elif not rows:
+            continue  # text between the header and the first row
+        for label, texts in cells.items():
+            rows[-1][label].append(" ".join(texts))
+        previous_bottom = max(word[Y1] for word in line)
+    return [{label: _join(fragments) for label, fragments in row.items()} for row in rows]
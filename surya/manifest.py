@@ -0,0 +1,113 @@
+import os, json, hashlib
+from collections import defaultdict
+import pandas as pd
+
+
+def normalize_order_id(value):
+    """Turn a manifest or page order id into the key used by the order index."""
+    return str(value).strip()
+
+
+def build_order_index(rows, key, normalize=normalize_order_id):
+    """
+    Groups manifest rows by order id so splitters can look them up in O(1).
+    :param rows: Rows returned by manifest_rows (or stream_export)
+    :param key: Column holding the order id
+    :param normalize: Callable mapping the column value to the lookup key
+    :return: dict of order id -> list of manifest rows, in manifest order
+    """
+    index = defaultdict(list)
+    for row in rows:
+        value = row.get(key)
+        if value is None or value != value:  # missing cell or NaN
+            continue
+        index[normalize(value)].append(row)
+    return dict(index)
+
+
+def read_export(file_path, **read_kwargs):
+    """Read an order export by extension: .xlsx, comma-separated .csv or tab-delimited .txt."""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".xlsx":
+        return pd.read_excel(file_path, **read_kwargs)
+    return pd.read_csv(file_path, delimiter="\t" if ext == ".txt" else ",", **read_kwargs)
+
+
+def file_digest(file_path):
+    """blake2b of a file's bytes, read in 1 MB blocks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as source:
+        for block in iter(lambda: source.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_manifest(file_path, columns, dtype=None, cache_dir="cache"):
+    """
+    Read only the given columns of an order export into a DataFrame, keeping a
+    Parquet copy in cache_dir. Later runs load the copy instead of parsing the
+    export again while its mtime and size, or else its content hash, still match.
+    Without pyarrow the export is read directly every time.
+    :param columns: Columns to keep; ones missing from the export are left out
+    :param dtype: dict of column -> dtype, e.g. str for ids that must not turn into floats
+    :param cache_dir: Folder holding the cached copies (None disables the cache)
+    """
+    columns = list(columns)
+    dtype = dtype or {}
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        cache_dir = None
+    if cache_dir:
+        stat = os.stat(file_path)
+        key = hashlib.blake2b(json.dumps([os.path.abspath(file_path), columns, sorted(map(str, dtype.items()))]).encode(), digest_size=8).hexdigest()
+        cache_path = os.path.join(cache_dir, f"{os.path.basename(file_path)}.{key}.parquet")
+        if os.path.exists(cache_path):
+            source = json.loads((pq.read_schema(cache_path).metadata or {}).get(b"surya_source", b"{}"))
+            if [source.get("mtime_ns"), source.get("size")] == [stat.st_mtime_ns, stat.st_size] or source.get("blake2b") == file_digest(file_path):
+                return pd.read_parquet(cache_path)
+
+    header = set(read_export(file_path, nrows=0).columns)
+    columns = [column for column in columns if column in header]
+    df = read_export(file_path, usecols=columns, dtype={column: kind for column, kind in dtype.items() if column in columns})[columns]
+    if not cache_dir:
+        return df
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return df  # mixed-type column, parquet can't hold it as is
+    source = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "blake2b": file_digest(file_path)}
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"surya_source": json.dumps(source).encode()})
+    os.makedirs(cache_dir, exist_ok=True)
+    pq.write_table(table, cache_path + ".tmp")
+    os.replace(cache_path + ".tmp", cache_path)
+    return df
+
+
+def manifest_rows(file_path, columns, dtype=None):
+    """
+    The rows of an order export as {column: value} dicts with only the given columns,
+    read through the columnar cache (read_manifest); the final_output_dict a splitter takes.
+    :param dtype: dict of column -> dtype; give the id columns str, which otherwise turn into floats next to empty cells
+    """
+    return read_manifest(file_path, columns, dtype).to_dict(orient="records")
+
+
+def stream_export(file_path, columns, dtype=None, chunksize=100_000, only=None):
+    """
+    Yield the rows of a .csv or tab-delimited .txt export as {column: value} dicts,
+    parsing chunksize lines of only the given columns at a time, so memory stays
+    flat however much history the export holds. Feed it straight to build_order_index.
+    :param only: Optional (column, ids) pair keeping just the rows whose id (normalize_order_id) is in ids
+    """
+    if os.path.splitext(file_path)[1].lower() == ".xlsx":
+        raise ValueError(f"{file_path}: only .csv and .txt exports can be streamed")
+    header = set(read_export(file_path, nrows=0).columns)
+    columns = [column for column in columns if column in header]
+    dtype = {column: kind for column, kind in (dtype or {}).items() if column in columns}
+    for chunk in read_export(file_path, usecols=columns, dtype=dtype, chunksize=chunksize):
+        if only:
+            column, ids = only
+            chunk = chunk[chunk[column].astype(str).str.strip().isin(ids)]
+        yield from chunk[columns].to_dict(orient="records")
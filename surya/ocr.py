@@ -0,0 +1,113 @@
+import io, os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import fitz  # PyMuPDF
+
+from surya.stats import timed, count
+
+# Tesseract bindings are imported inside the OCR workers only, so runs that never OCR a page don't load them
+_api = None
+_config = None
+
+
+def region_rect(page, region):
+    """Turn a template region given as page fractions (x0, y0, x1, y1) into a clip rect."""
+    rect = page.rect
+    x0, y0, x1, y1 = region
+    return fitz.Rect(rect.x0 + x0 * rect.width, rect.y0 + y0 * rect.height, rect.x0 + x1 * rect.width, rect.y0 + y1 * rect.height)
+
+
+def page_text(page, ocr_pool=None):
+    """Text layer of a page, or with ocr_pool its OCR text when the page has no text layer."""
+    text = page.get_text("text")
+    if not text.strip() and ocr_pool:
+        # OCR the page's own pixmap on the long-lived Tesseract workers
+        text = ocr_pool.ocr_pages([page])[0]
+    return text
+
+
+def _init_worker(lang, oem, psm):
+    global _api, _config
+    _config = f"--oem {oem} --psm {psm}"
+    try:
+        import tesserocr  # keeps one Tesseract engine loaded per worker
+    except ImportError:
+        return  # pytesseract fallback starts a tesseract process per image
+    _api = tesserocr.PyTessBaseAPI(lang=lang, oem=oem, psm=psm)
+
+
+def _ocr_png(png):
+    from PIL import Image
+    image = Image.open(io.BytesIO(png))
+    if _api is not None:
+        _api.SetImage(image)
+        return _api.GetUTF8Text()
+    import pytesseract
+    return pytesseract.image_to_string(image, config=_config)
+
+
+class OcrPool:
+    """
+    OCR stage fed straight from fitz pixmaps and served by long-lived Tesseract
+    worker processes, so pages are neither re-rasterized by poppler nor paid a
+    process start each. The pool is only started on the first OCR request.
+    :param workers: Number of OCR processes (default: CPU count)
+    :param dpi: Resolution whole pages are rasterized at
+    :param roi_dpi: Resolution template regions are rasterized at (see ocr_regions)
+    :param lang, oem, psm: Tesseract language, engine mode and page segmentation mode
+    """
+
+    def __init__(self, workers=None, dpi=200, roi_dpi=300, lang="eng", oem=3, psm=6):
+        self.workers = workers or os.cpu_count()
+        self.dpi = dpi
+        self.roi_dpi = roi_dpi
+        self.lang, self.oem, self.psm = lang, oem, psm
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def render(self, page, clip=None, dpi=None):
+        """Rasterize a page (or only its clip rect) to grayscale PNG bytes."""
+        pix = page.get_pixmap(dpi=dpi or self.dpi, clip=clip, colorspace=fitz.csGRAY)
+        return pix.tobytes("png")
+
+    @timed("ocr")
+    def ocr_images(self, pngs):
+        """
+        OCR rendered PNG images concurrently; results come back in input order.
+        At most two images per worker are in flight, so renders can be lazy.
+        """
+        texts = []
+        in_flight = deque()
+        for png in pngs:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self.lang, self.oem, self.psm))
+            in_flight.append(self._pool.submit(_ocr_png, png))
+            if len(in_flight) >= self.workers * 2:
+                texts.append(in_flight.popleft().result())
+        texts.extend(future.result() for future in in_flight)
+        count("ocr.images", len(texts))
+        return texts
+
+    def ocr_pages(self, pages):
+        """OCR whole pages concurrently, rendering each one only when a worker slot frees up."""
+        return self.ocr_images(self.render(page) for page in pages)
+
+    def ocr_regions(self, pages, template):
+        """
+        OCR only the known label regions of each page instead of the whole page.
+        :param template: dict of region name -> (x0, y0, x1, y1) as fractions of the page size
+        :return: one {region name: text} dict per page
+        """
+        names = list(template)
+        texts = self.ocr_images(self.render(page, clip=region_rect(page, template[name]), dpi=self.roi_dpi) for page in pages for name in names)
+        return [dict(zip(names, texts[i:i + len(names)])) for i in range(0, len(texts), len(names))]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,30 @@
+from surya.runlog import start_run_log
+from surya.sink import open_sink
+from surya.export import OrderExporter
+from surya.label_index import LABEL_INDEX
+from surya.batches import write_pick_batches
+
+
+def run_split(marketplace, split, pdf_path, output_folder, final_output_dict, pick_batches=False, archive=None, export=None, label_index=LABEL_INDEX, cropped=False, **options):
+    """
+    What every splitter's run() does once its manifest is loaded: start a fresh run
+    log, open the output sink and exporter, split, close them and write the pick batches.
+    :param split: The splitter's split_pdf_custom / split_pdf_by_orderid
+    :param pick_batches: Also merge the orders into print batches sorted by SKU and quantity (write_pick_batches)
+    :param archive: "zip" or "tar" to stream the orders into <output_folder>.zip/.tar with an index instead of loose files
+    :param export: .jsonl, .csv or .parquet file receiving each order (order id, sku, qty, AWB, pages, output path) once it is final
+    :param label_index: SQLite file indexing the written labels by AWB, order id, sub-order id and SKU, None to skip
+    :param cropped: The splitter writes cropped labels rather than page copies (write_pick_batches)
+    :param options: Passed on to split
+    :return: order_pages returned by split
+    """
+    start_run_log(marketplace)
+    sink = open_sink(output_folder, archive)
+    exporter = OrderExporter(export, marketplace) if export else None
+    order_pages = split(pdf_path, output_folder, final_output_dict, sink=sink, exporter=exporter, label_index=label_index, **options)
+    sink.close()
+    if exporter:
+        exporter.close()
+    if pick_batches:
+        write_pick_batches(order_pages, output_folder, pdf_path, cropped=cropped)
+    return order_pages
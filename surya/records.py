@@ -0,0 +1,83 @@
+from array import array
+
+
+class LineItem:
+    """
+    One product line of an order: SKU, quantity, the AWB (FirstCry: shipment id)
+    it ships under and, where the manifest has one (Meesho), its sub-order id,
+    from the manifest or read off the label.
+    """
+    __slots__ = ("sku", "qty", "awb", "sub_order_id")
+
+    def __init__(self, sku, qty, awb=None, sub_order_id=None):
+        self.sku = sku
+        self.qty = qty
+        self.awb = awb
+        self.sub_order_id = sub_order_id
+
+    @classmethod
+    def from_detail(cls, detail):
+        """Item from a splitter's detail dict: {"sku", "Qty", "AWB"} (Meesho: plus "sub_order_id") or FirstCry's {"sku", "Qty", "shipment_id"}."""
+        return cls(detail.get("sku"), detail.get("Qty"), detail.get("AWB", detail.get("shipment_id")), detail.get("sub_order_id"))
+
+    def to_json(self):
+        return [self.sku, self.qty, self.awb, self.sub_order_id]
+
+    def __repr__(self):
+        return f"LineItem({self.sku!r}, {self.qty!r}, {self.awb!r}, {self.sub_order_id!r})"
+
+
+class OrderRecord:
+    """
+    One order of a split, the values of the order_pages dict every splitter returns
+    (keyed by order id; Meesho by AWB). Slots and a page array keep long runs small,
+    and consumers read fields instead of telling page ints from detail entries.
+    :param order_id: Order id (Meesho: purchase order no.)
+    :param awb: AWB of the order (FirstCry: shipment id); defaults to the first item's
+    :param pages: Source page indexes the order covers, in order
+    :param items: LineItems
+    :param output_path: Where its PDF was written (output_pdf_location), None until then
+    """
+    __slots__ = ("order_id", "awb", "pages", "items", "output_path")
+
+    def __init__(self, order_id, awb=None, pages=(), items=(), output_path=None):
+        self.order_id = order_id
+        self.awb = awb
+        self.pages = array("i", pages)
+        self.items = []
+        self.output_path = output_path
+        self.add_items(items)
+
+    def add_items(self, details):
+        """Append items, given as LineItems or detail dicts; the first item with an AWB sets the order's."""
+        for detail in details:
+            item = detail if isinstance(detail, LineItem) else LineItem.from_detail(detail)
+            self.items.append(item)
+            if self.awb is None:
+                self.awb = item.awb
+
+    def to_json(self):
+        """Plain form for the checkpoint journal and fingerprint store."""
+        return {"order_id": self.order_id, "awb": self.awb, "pages": list(self.pages), "items": [item.to_json() for item in self.items], "output_path": self.output_path}
+
+    @classmethod
+    def from_json(cls, value, pages=None):
+        """
+        Record from to_json().
+        :param pages: Source pages to use instead of the stored ones
+        """
+        record = cls(value["order_id"], value["awb"], value["pages"], [LineItem(*item) for item in value["items"]], value["output_path"])
+        if pages is not None:
+            record.pages = array("i", pages)
+        return record
+
+    def __repr__(self):
+        return f"OrderRecord({self.order_id!r}, awb={self.awb!r}, pages={list(self.pages)}, items={self.items}, output_path={self.output_path!r})"
+
+
+def segment_records(segment):
+    """
+    (order_pages key, OrderRecord) pairs of a checkpoint or fingerprint segment, covering
+    the segment's pages: an order kept from an earlier run may sit elsewhere in this PDF.
+    """
+    return [(key, OrderRecord.from_json(value, pages=range(*segment["pages"]))) for key, value in segment["order_pages"]]
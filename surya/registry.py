@@ -0,0 +1,47 @@
+import importlib
+
+from surya.manifest import read_export
+
+# Marketplace name -> splitter entry, see register()
+MARKETPLACES = {}
+
+
+def register(name, module, manifest_columns, pdf_path=None, file_path=None, ocr=False, sharded=False):
+    """
+    Add a marketplace splitter. Its module is only imported the first time it is used.
+    :param module: Dotted module path exposing run(pdf_path, file_path, output_folder, ...)
+    :param manifest_columns: Columns only this marketplace's order export has, used to detect it
+    :param pdf_path, file_path: Sample label PDF and order export used when none are given
+    :param ocr: True when run() accepts a shared ocr_pool
+    :param sharded: True when run() accepts workers, to split page shards in that many processes
+    """
+    MARKETPLACES[name] = {"module": module, "manifest_columns": set(manifest_columns), "pdf_path": pdf_path, "file_path": file_path, "ocr": ocr, "sharded": sharded}
+
+
+def load_splitter(name):
+    """Import (or fetch the already imported) splitter module of a marketplace."""
+    return importlib.import_module(MARKETPLACES[name]["module"])
+
+
+def read_manifest_columns(file_path):
+    """Header row of an order export: .xlsx, comma-separated .csv or tab-delimited .txt."""
+    return set(read_export(file_path, nrows=0).columns)
+
+
+def detect_marketplace(file_path):
+    """Marketplace whose order export columns all appear in the manifest's header row."""
+    columns = read_manifest_columns(file_path)
+    for name, entry in MARKETPLACES.items():
+        if entry["manifest_columns"] <= columns:
+            return name
+    raise ValueError(f"Could not tell the marketplace of {file_path} from its columns")
+
+
+register("amazon", "amazon_final_integrate.amazon", {"order-id", "tracking-id", "quantity-purchased"},
+         "amazon_final_integrate/amazon.pdf", "amazon_final_integrate/amazon.txt", ocr=True)
+register("flipkart", "flipkart_final_integrate.flipkart", {"Order Id", "Tracking ID", "Quantity"},
+         "flipkart_final_integrate/flipkart.pdf", "flipkart_final_integrate/flipkart.csv")
+register("meesho", "meesho_final_integrate.meesho", {"Sub Order No.", "AWB", "Qty."},
+         "meesho_final_integrate/meesho.pdf", "meesho_final_integrate/meesho.xlsx", sharded=True)
+register("firstcry", "first_cry_final_integrate.firstcry", {"Order ID", "AWB No", "Vendor Style Code"},
+         "first_cry_final_integrate/firstcry.pdf", "first_cry_final_integrate/firstcry.xlsx", ocr=True)
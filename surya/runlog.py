@@ -0,0 +1,72 @@
+import os, json
+from datetime import datetime
+
+from surya.stats import count
+
+
+class RunLog:
+    """
+    One log per splitter run: keeps logs/logfile_<marketplace>.txt open, buffers
+    writes and flushes them in batches, and writes machine-readable records to
+    logs/logfile_<marketplace>.jsonl next to it. Close it in a finally (or use it
+    as a with block): entries still buffered when a run crashes are otherwise lost.
+    :param marketplace: Name used in the log file names (amazon, flipkart, ...)
+    :param log_dir: Folder holding the log files
+    :param mode: "a" to append to the current run, "w" to start a new one
+    :param flush_every: Number of buffered entries that triggers a flush
+    """
+
+    def __init__(self, marketplace, log_dir="logs", mode="a", flush_every=200):
+        if not os.path.exists(log_dir):
+            os.makedirs(log_dir)
+        self.text_path = os.path.join(log_dir, f"logfile_{marketplace}.txt")
+        self.jsonl_path = os.path.join(log_dir, f"logfile_{marketplace}.jsonl")
+        self.flush_every = flush_every
+        self._text = open(self.text_path, mode, encoding="utf-8")
+        self._jsonl = open(self.jsonl_path, mode, encoding="utf-8")
+        self._lines = []
+        self._records = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, text):
+        """Queue human-readable text, exactly as it should appear in the .txt log."""
+        self._lines.append(text)
+        if len(self._lines) + len(self._records) >= self.flush_every:
+            self.flush()
+
+    def record(self, **fields):
+        """Queue one JSONL record, e.g. page, order_id, awb, path and duration; a page's path also counts towards the run report."""
+        if "path" in fields:
+            count(f"pages.{fields['path']}")
+        self._records.append(json.dumps({"time": datetime.now().isoformat(timespec="milliseconds"), **fields}, default=str))
+        if len(self._lines) + len(self._records) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered so far with one write call per file."""
+        if self._lines:
+            self._text.write("".join(self._lines))
+            self._text.flush()
+            self._lines = []
+        if self._records:
+            self._jsonl.write("\n".join(self._records) + "\n")
+            self._jsonl.flush()
+            self._records = []
+
+    def close(self):
+        if self._text.closed:
+            return
+        self.flush()
+        self._text.close()
+        self._jsonl.close()
+
+
+def start_run_log(marketplace, log_dir="logs"):
+    """Truncate the marketplace logs and write the run header, like the scripts' __main__ always did."""
+    with RunLog(marketplace, log_dir, mode="w") as log:
+        log.write(f"Starting the log for mentioned time:{datetime.today().strftime('%Y-%m-%d %H:%M:%S')}\n")
@@ -0,0 +1,188 @@
+import os, io, csv, time, zipfile, tarfile
+import fitz  # PyMuPDF
+
+ARCHIVE_SEPARATOR = "::"  # output location of an archived order: <archive path>::<member name>
+INDEX_NAME = "index.csv"
+INDEX_COLUMNS = ["name", "order_id", "awb", "first_page", "pages", "bytes"]
+
+
+class DirectorySink:
+    """
+    Writes every order PDF as its own file in output_folder, as the splitters always did.
+    Files stay readable between runs, so incremental reuse and resuming can keep them.
+    :param output_folder: Folder receiving Order_<id>.pdf files
+    """
+    reusable = True
+
+    def __init__(self, output_folder):
+        self.output_folder = output_folder
+        os.makedirs(output_folder, exist_ok=True)
+
+    def location(self, name):
+        return os.path.join(self.output_folder, name)
+
+    def part_spec(self, tag):
+        """(sink class, args) a worker process opens to write its share: the same folder."""
+        return DirectorySink, (self.output_folder,)
+
+    def write(self, name, doc, save_options=None, **entry):
+        """Save one order document as name; entry (order_id, awb, first_page, pages) is only used by archives. Returns its location."""
+        output_pdf_path = self.location(name)
+        doc.save(output_pdf_path, **(save_options or {}))
+        return output_pdf_path
+
+    def close(self):
+        pass
+
+
+class ArchiveSink:
+    """
+    Streams the order PDFs one after another into a single archive next to the
+    output folder, with index.csv (one row per order: member name, order id, AWB,
+    source pages, size) as its last member. The archive is built under a .tmp name
+    and only renamed into place by close(), so a run that dies never leaves a
+    half-written archive for the packing floor. Every run writes a fresh archive,
+    and a member, once added, cannot be replaced: writing a name twice is refused.
+    :param path: Archive file to write
+    :param part: Tag of a worker process' part archive (<path>.part<tag>, merged in by absorb()); locations still name path
+    """
+    reusable = False  # written afresh every run, so the splitters keep no orders to resume from or reuse
+    extension = None
+
+    def __init__(self, path, part=None):
+        self.path = path
+        self.file_path = path if part is None else f"{path}.part{part}"
+        self.entries = {}  # member name -> index row; an order written twice keeps its last row
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._temp_path = self.file_path + ".tmp"
+        self._open(self._temp_path)
+
+    def location(self, name):
+        return f"{self.path}{ARCHIVE_SEPARATOR}{name}"
+
+    def part_spec(self, tag):
+        """(sink class, args) a worker process opens to write its share: a part archive for absorb()."""
+        return type(self), (self.path, tag)
+
+    def write(self, name, doc, save_options=None, **entry):
+        """Add one order document as member name with its index row. Returns its location."""
+        self._check_new(name)
+        data = doc.tobytes(**(save_options or {}))
+        self._add(name, data)
+        self.entries[name] = {**entry, "name": name, "bytes": len(data)}
+        return self.location(name)
+
+    def absorb(self, part_path):
+        """Copy the members of a closed part archive in order, taking over its index rows, then delete it."""
+        for name, data in self._members(part_path):
+            if name == INDEX_NAME:
+                self.entries.update((row["name"], row) for row in csv.DictReader(io.StringIO(data.decode("utf-8"))))
+            else:
+                self._check_new(name)
+                self._add(name, data)
+        os.remove(part_path)
+
+    def _check_new(self, name):
+        if name in self.entries:
+            raise ValueError(f"{name} is already in {self.path}; archive members cannot be replaced")
+
+    def close(self):
+        rows = io.StringIO()
+        writer = csv.DictWriter(rows, fieldnames=INDEX_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(self.entries.values())
+        self._add(INDEX_NAME, rows.getvalue().encode("utf-8"))
+        self._close()
+        os.replace(self._temp_path, self.file_path)
+
+
+class ZipSink(ArchiveSink):
+    """ArchiveSink writing a .zip; members are stored, the PDFs are compressed already."""
+    extension = ".zip"
+
+    def _open(self, path):
+        self._archive = zipfile.ZipFile(path, "w", zipfile.ZIP_STORED, allowZip64=True)
+
+    def _add(self, name, data):
+        self._archive.writestr(zipfile.ZipInfo(name, time.localtime()[:6]), data)
+
+    def _close(self):
+        self._archive.close()
+
+    @staticmethod
+    def _members(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                yield info.filename, archive.read(info)
+
+
+class TarSink(ArchiveSink):
+    """ArchiveSink writing an uncompressed .tar."""
+    extension = ".tar"
+
+    def _open(self, path):
+        self._archive = tarfile.open(path, "w")
+
+    def _add(self, name, data):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = time.time()
+        self._archive.addfile(info, io.BytesIO(data))
+
+    def _close(self):
+        self._archive.close()
+
+    @staticmethod
+    def _members(path):
+        with tarfile.open(path) as archive:
+            for info in archive:
+                yield info.name, archive.extractfile(info).read()
+
+
+SINKS = {"zip": ZipSink, "tar": TarSink}
+
+
+def open_sink(output_folder, archive=None):
+    """
+    Output sink for a run: loose files in output_folder, or with archive="zip"/"tar"
+    a single <output_folder>.zip/.tar.
+    """
+    if not archive:
+        return DirectorySink(output_folder)
+    if archive not in SINKS:
+        raise ValueError(f"Unknown archive format {archive!r}, expected one of {sorted(SINKS)}")
+    sink_class = SINKS[archive]
+    return sink_class(output_folder.rstrip("/\\") + sink_class.extension)
+
+
+class OutputReader:
+    """
+    Opens order PDFs by their OrderRecord.output_path, whether a loose file or an
+    archive member; archives are opened once and kept open until close().
+    """
+
+    def __init__(self):
+        self._archives = {}
+
+    def open(self, location):
+        """Open fitz document of one order, or None when it does not exist."""
+        if ARCHIVE_SEPARATOR not in location:
+            return fitz.open(location) if os.path.exists(location) else None
+        path, name = location.rsplit(ARCHIVE_SEPARATOR, 1)
+        if path not in self._archives:
+            if not os.path.exists(path):
+                return None
+            self._archives[path] = zipfile.ZipFile(path) if zipfile.is_zipfile(path) else tarfile.open(path)
+        archive = self._archives[path]
+        try:
+            data = archive.read(name) if isinstance(archive, zipfile.ZipFile) else archive.extractfile(name).read()
+        except KeyError:
+            return None
+        return fitz.open(stream=data, filetype="pdf")
+
+    def close(self):
+        for archive in self._archives.values():
+            archive.close()
+        self._archives = {}
@@ -0,0 +1,130 @@
+import os, json, time, cProfile, functools
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+# Histogram bucket upper bounds in milliseconds; the last bucket takes everything slower
+BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+_active = None  # RunStats of the run in progress in this process, see RunStats.start()
+
+
+class RunStats:
+    """
+    Per-run hot-path instrumentation: timing histograms per stage (fitz, camelot,
+    ocr, manifest, save, ...) and counters such as how many pages took each path.
+    Code marks stages with @timed / stage() and counts with count(); both are
+    no-ops while no RunStats is started. finish() writes logs/report_<marketplace>.json
+    and, with profile=True, a cProfile dump next to it.
+    :param marketplace: Name used in the report file names
+    :param log_dir: Folder receiving the report
+    :param profile: Also run cProfile for the whole run and dump logs/profile_<marketplace>.prof
+    """
+
+    def __init__(self, marketplace, log_dir="logs", profile=False):
+        self.marketplace = marketplace
+        self.log_dir = log_dir
+        self.stages = {}
+        self.counters = Counter()
+        self._profiler = cProfile.Profile() if profile else None
+        self._started = None
+
+    def start(self):
+        global _active
+        _active = self
+        self._started = time.perf_counter()
+        if self._profiler:
+            self._profiler.enable()
+        return self
+
+    def add(self, stage, seconds):
+        entry = self.stages.setdefault(stage, {"calls": 0, "seconds": 0.0, "max": 0.0, "buckets": [0] * (len(BUCKETS_MS) + 1)})
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+        entry["max"] = max(entry["max"], seconds)
+        milliseconds = seconds * 1000
+        entry["buckets"][next((i for i, bound in enumerate(BUCKETS_MS) if milliseconds <= bound), len(BUCKETS_MS))] += 1
+
+    def drain(self):
+        """Hand over everything collected so far (e.g. from a worker process) and start from zero."""
+        snapshot = {"stages": self.stages, "counters": dict(self.counters)}
+        self.stages, self.counters = {}, Counter()
+        return snapshot
+
+    def merge(self, snapshot):
+        """Add a drain() snapshot from another process."""
+        for stage, other in snapshot["stages"].items():
+            entry = self.stages.setdefault(stage, {"calls": 0, "seconds": 0.0, "max": 0.0, "buckets": [0] * (len(BUCKETS_MS) + 1)})
+            entry["calls"] += other["calls"]
+            entry["seconds"] += other["seconds"]
+            entry["max"] = max(entry["max"], other["max"])
+            entry["buckets"] = [a + b for a, b in zip(entry["buckets"], other["buckets"])]
+        self.counters.update(snapshot["counters"])
+
+    def report(self):
+        labels = [f"<={bound}ms" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "marketplace": self.marketplace,
+            "finished": datetime.now().isoformat(timespec="seconds"),
+            "seconds": round(time.perf_counter() - self._started, 3) if self._started else None,
+            "stages": {
+                stage: {
+                    "calls": entry["calls"],
+                    "seconds": round(entry["seconds"], 4),
+                    "mean_ms": round(entry["seconds"] * 1000 / entry["calls"], 3),
+                    "max_ms": round(entry["max"] * 1000, 3),
+                    "histogram": {label: n for label, n in zip(labels, entry["buckets"]) if n},
+                }
+                for stage, entry in sorted(self.stages.items(), key=lambda item: -item[1]["seconds"])
+            },
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def finish(self):
+        """Stop collecting and write the JSON report (and profile); returns the report."""
+        global _active
+        if self._profiler:
+            self._profiler.disable()
+        if _active is self:
+            _active = None
+        os.makedirs(self.log_dir, exist_ok=True)
+        report = self.report()
+        with open(os.path.join(self.log_dir, f"report_{self.marketplace}.json"), "w", encoding="utf-8") as out:
+            json.dump(report, out, indent=1)
+        if self._profiler:
+            self._profiler.dump_stats(os.path.join(self.log_dir, f"profile_{self.marketplace}.prof"))
+        return report
+
+
+def timed(stage_name):
+    """Decorator adding every call's duration to stage_name of the active RunStats."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if _active is not None:
+                    _active.add(stage_name, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def stage(stage_name):
+    """Time a block into stage_name of the active RunStats."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if _active is not None:
+            _active.add(stage_name, time.perf_counter() - started)
+
+
+def count(counter, n=1):
+    """Bump a counter of the active RunStats, e.g. count("path.camelot")."""
+    if _active is not None:
+        _active.counters[counter] += n
@@ -0,0 +1,78 @@
+import os, time, shutil
+from datetime import datetime
+
+from surya.ocr import OcrPool
+from surya.registry import MARKETPLACES, load_splitter, detect_marketplace
+
+MANIFEST_EXTENSIONS = (".xlsx", ".csv", ".txt")
+
+
+class InboxWatcher:
+    """
+    Service mode: polls an inbox folder for label PDFs that arrive together with
+    their order export under the same name (e.g. batch_12.pdf + batch_12.xlsx),
+    detects the marketplace from the export's columns and runs that splitter in
+    this process. A splitter module is imported with its first job and, like the
+    OCR workers, stays loaded between jobs. Processed pairs move to inbox/done,
+    or inbox/failed when a split fails. Every job adds its labels to the label
+    index output_root/labels.sqlite.
+    :param inbox: Folder to watch
+    :param output_root: Folder receiving the <marketplace>_output_pdfs folders
+    :param interval: Seconds between polls; a file is picked up once its size held for one poll
+    """
+
+    def __init__(self, inbox, output_root="outputs", interval=2.0):
+        self.inbox = inbox
+        self.output_root = output_root
+        self.interval = interval
+        for folder in (inbox, os.path.join(inbox, "done"), os.path.join(inbox, "failed")):
+            os.makedirs(folder, exist_ok=True)
+        self.ocr_pool = OcrPool()  # worker processes start with the first OCR'd page
+        self._sizes = {}
+
+    def ready_pairs(self):
+        """PDF and manifest pairs whose files kept their size since the previous poll (i.e. finished downloading)."""
+        pairs = []
+        sizes = {}
+        names = set(os.listdir(self.inbox))
+        for name in sorted(names):
+            stem, ext = os.path.splitext(name)
+            manifest = next((stem + manifest_ext for manifest_ext in MANIFEST_EXTENSIONS if stem + manifest_ext in names), None)
+            if ext.lower() != ".pdf" or manifest is None:
+                continue
+            pdf_path, file_path = os.path.join(self.inbox, name), os.path.join(self.inbox, manifest)
+            sizes[pdf_path] = (os.path.getsize(pdf_path), os.path.getsize(file_path))
+            if self._sizes.get(pdf_path) == sizes[pdf_path]:
+                pairs.append((pdf_path, file_path))
+        self._sizes = sizes
+        return pairs
+
+    def process(self, pdf_path, file_path):
+        marketplace = detect_marketplace(file_path)
+        output_folder = os.path.join(self.output_root, f"{marketplace}_output_pdfs")
+        options = {"ocr_pool": self.ocr_pool} if MARKETPLACES[marketplace]["ocr"] else {}
+        started = time.perf_counter()
+        order_pages = load_splitter(marketplace).run(pdf_path, file_path, output_folder, label_index=os.path.join(self.output_root, "labels.sqlite"), **options)
+        print(f"{os.path.basename(pdf_path)}: {len(order_pages)} {marketplace} orders in {output_folder} ({time.perf_counter() - started:.1f}s)")
+
+    def archive(self, paths, folder):
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        for path in paths:
+            shutil.move(path, os.path.join(self.inbox, folder, f"{stamp}_{os.path.basename(path)}"))
+
+    def run_forever(self):
+        print(f"Watching {self.inbox} for label PDFs")
+        try:
+            while True:
+                for pdf_path, file_path in self.ready_pairs():
+                    try:
+                        self.process(pdf_path, file_path)
+                        self.archive((pdf_path, file_path), "done")
+                    except Exception as e:
+                        print(f"Failed to split {pdf_path}: {e}")
+                        self.archive((pdf_path, file_path), "failed")
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.ocr_pool.close()
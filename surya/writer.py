@@ -0,0 +1,102 @@
+import fitz  # PyMuPDF
+
+from surya.stats import stage, timed
+from surya.sink import DirectorySink
+
+# Compact saving: drop unused and merge duplicate objects (garbage=4 also compares streams),
+# compress every stream and pack the small objects into object streams
+COMPACT_SAVE = {"garbage": 4, "deflate": True, "use_objstms": 1}
+
+
+def add_cropped_label(new_doc, doc, page_num, top_ratio):
+    """
+    Add a source page to new_doc as two pages: its top top_ratio of the height, then the rest.
+    Both crops draw the same embedded XObject of the source page (PyMuPDF reuses it within
+    one target document), so its fonts and images are stored once per output file.
+    """
+    rect = doc[page_num].rect
+    top_height = rect.height * top_ratio
+    for clip in (fitz.Rect(0, 0, rect.width, top_height), fitz.Rect(0, top_height, rect.width, rect.height)):
+        crop_page = new_doc.new_page(width=rect.width, height=clip.height)
+        crop_page.show_pdf_page(crop_page.rect, doc, page_num, clip=clip)
+
+
+@timed("save")
+def save_order_pdf(new_doc, sink, name, log, compact=True, **entry):
+    """Writes a finished order's label PDF to the output sink once, after its last continuation page (compact: with COMPACT_SAVE)."""
+    output_pdf_path = sink.write(name, new_doc, COMPACT_SAVE if compact else None, **entry)
+    new_doc.close()
+    log.write(f"✅ Split PDF saved as: {output_pdf_path}\n")
+
+
+def page_ranges(page_nums):
+    """Collapse sorted page numbers into (first, last) runs, e.g. [1, 2, 3, 7] -> [(1, 3), (7, 7)]."""
+    ranges = []
+    for page_num in page_nums:
+        if ranges and page_num == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], page_num)
+        else:
+            ranges.append((page_num, page_num))
+    return ranges
+
+
+class OrderPdfWriter:
+    """
+    Writes per-order PDFs straight from the already open source document by
+    copying page ranges, so no second parse of the input is needed. An order can
+    be emitted as soon as its last page is known; finish() writes the rest. With
+    an archive sink, whose members cannot be replaced, emit() only writes from
+    finish(), once no order can gain pages any more.
+    :param doc: Open fitz document the pages are copied from
+    :param output_folder: Folder receiving Order_<orderid>.pdf files
+    :param log: Optional RunLog receiving a "Saved: <path>" line per file
+    :param fingerprints: Optional FingerprintStore; orders a previous run wrote from the same pages and manifest rows are not rewritten
+    :param sink: Where the files go (surya.sink); default loose files in output_folder
+    :param exporter: Optional OrderExporter receiving every emitted order
+    """
+
+    def __init__(self, doc, output_folder, log=None, fingerprints=None, sink=None, exporter=None):
+        self.doc = doc
+        self.output_folder = output_folder
+        self.log = log
+        self.fingerprints = fingerprints
+        self.sink = sink or DirectorySink(output_folder)
+        self.exporter = exporter
+        self._written = {}
+
+    def emit(self, record, final=False):
+        """
+        Write one order from its OrderRecord and set the record's output_path.
+        Orders whose pages did not change since they were last written are skipped.
+        :param final: The order can no longer gain pages (set by finish())
+        :return: Output path, or None when nothing was written
+        """
+        orderid = record.order_id
+        pages = tuple(sorted(record.pages))
+        if not pages or self._written.get(orderid) == pages or not (final or self.sink.reusable):
+            return None
+        output_pdf_path = self.sink.location(f"Order_{orderid}.pdf")
+        if orderid not in self._written and self.fingerprints and self.fingerprints.unchanged(output_pdf_path, pages, [orderid]):
+            if self.log:
+                self.log.write(f"Unchanged: {output_pdf_path}\n")
+        else:
+            with stage("save"):
+                new_doc = fitz.open()
+                for first, last in page_ranges(pages):
+                    new_doc.insert_pdf(self.doc, from_page=first, to_page=last)
+                self.sink.write(f"Order_{orderid}.pdf", new_doc, order_id=orderid, awb=record.awb, first_page=pages[0], pages=len(pages))
+                new_doc.close()
+            if self.log:
+                self.log.write(f"Saved: {output_pdf_path}\n")
+        if self.fingerprints:
+            self.fingerprints.remember(output_pdf_path, pages, [orderid])
+        self._written[orderid] = pages
+        record.output_path = output_pdf_path
+        if self.exporter:
+            self.exporter.write(record)
+        return output_pdf_path
+
+    def finish(self, order_pages):
+        """Write every order that is still pending or gained pages after it was emitted."""
+        for record in order_pages.values():
+            self.emit(record, final=True)
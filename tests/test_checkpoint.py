@@ -0,0 +1,60 @@
+import pytest
+
+from benchmarks.synthetic import make_labels
+from meesho_final_integrate import meesho
+from surya.checkpoint import CheckpointJournal
+
+
+def tear_last_line(path):
+    """Cut the journal's last commit in half, as a crash in the middle of writing it would."""
+    with open(path, "rb+") as journal:
+        data = journal.read().rstrip(b"\n")
+        last_line = data.rfind(b"\n") + 1
+        journal.truncate(last_line + (len(data) - last_line) // 2)
+
+
+def test_commit_after_torn_line_is_read_back(tmp_path):
+    pdf_path = tmp_path / "labels.pdf"
+    pdf_path.write_bytes(b"%PDF")
+    journal = CheckpointJournal(str(tmp_path / "out"), str(pdf_path)).open()
+    journal.commit(0, 2, state={"prev_awb": "A"})
+    journal.commit(2, 3, state={"prev_awb": "B"})
+    journal.close()
+    tear_last_line(journal.path)
+
+    journal = CheckpointJournal(str(tmp_path / "out"), str(pdf_path))
+    assert [segment["pages"] for segment in journal.load()] == [[0, 2]]
+    journal.open(resume=True)
+    journal.commit(2, 4, state={"prev_awb": "C"})
+    journal.close()
+    assert [segment["pages"] for segment in journal.load()] == [[0, 2], [2, 4]]
+
+
+def split(rows, output_folder, **options):
+    order_pages = meesho.split_pdf_custom("labels.pdf", output_folder, rows, top_ratio=0.345, incremental=False, label_index=None, **options)
+    return {key: (list(record.pages), [(item.sku, str(item.qty), item.sub_order_id) for item in record.items], record.output_path.split("/")[-1]) for key, record in order_pages.items()}
+
+
+def test_resume_after_crash_mid_commit(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # run logs go to ./logs
+    make_labels("meesho", "labels.pdf", "labels.xlsx", 60, image_every=0)
+    rows = meesho.load_manifest("labels.xlsx")
+    expected = split(rows, "clean", resume=False)
+
+    save_order_pdf = meesho.save_order_pdf
+    saved = []
+
+    def crash_after_ten(*args, **entry):
+        if len(saved) == 10:
+            raise RuntimeError("crash")
+        saved.append(entry)
+        return save_order_pdf(*args, **entry)
+
+    monkeypatch.setattr(meesho, "save_order_pdf", crash_after_ten)
+    with pytest.raises(RuntimeError):
+        split(rows, "resumed", resume=False)
+    monkeypatch.setattr(meesho, "save_order_pdf", save_order_pdf)
+    tear_last_line("resumed.checkpoint.jsonl")
+
+    assert split(rows, "resumed") == expected
+    assert split(rows, "resumed") == expected  # the finished journal starts the next run afresh
@@ -0,0 +1,24 @@
+import json, os
+
+import fitz  # PyMuPDF
+
+from surya.fingerprint import FingerprintStore
+
+
+def test_store_cut_short_is_treated_as_empty(tmp_path):
+    doc = fitz.open()
+    doc.new_page()
+    output_folder = str(tmp_path / "out")
+    store = FingerprintStore(output_folder, doc, {}, {"top_ratio": 0.4})
+    store.store(0, "ocr", "AWB 123")
+    store.save()
+    assert FingerprintStore(output_folder, doc, {}, {"top_ratio": 0.4}).cached(0, "ocr") == "AWB 123"
+
+    with open(store.path, "r+", encoding="utf-8") as cut:
+        cut.truncate(len(cut.read()) // 2)
+    store = FingerprintStore(output_folder, doc, {}, {"top_ratio": 0.4})
+    assert store.cached(0, "ocr") is None
+    store.save()
+    with open(store.path, encoding="utf-8") as saved:
+        assert json.load(saved)["params"] == {"top_ratio": 0.4}
+    assert not os.path.exists(store.path + ".tmp")
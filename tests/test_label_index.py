@@ -0,0 +1,43 @@
+import pytest
+
+from benchmarks.synthetic import make_labels
+from flipkart_final_integrate import flipkart
+from surya.label_index import LabelIndex
+
+SECOND_ORDER = "OD999999999999999999"  # printed on the first label next to its own order
+
+
+@pytest.fixture
+def two_order_label(tmp_path, monkeypatch):
+    """Synthetic Flipkart PDF whose first label carries a second order's item row."""
+    monkeypatch.chdir(tmp_path)  # run logs go to ./logs
+    make_labels("flipkart", "labels.pdf", "labels.csv", 12, image_every=0, missing_every=0)
+    read_table = flipkart.extract_table_with_words
+
+    def with_second_order(session, page_num):
+        table = read_table(session, page_num)
+        if page_num == 0:
+            table = {column: values + [values[0]] for column, values in table.items()}
+            table[" ID | Description"][-1] = "1 SKU-EXTRA | Second order item"
+            table["Order No."][-1] = SECOND_ORDER
+        return table
+
+    monkeypatch.setattr(flipkart, "extract_table_with_words", with_second_order)
+    return "labels.pdf", flipkart.load_manifest("labels.csv")
+
+
+def test_every_order_on_a_label_is_indexed(two_order_label):
+    pdf_path, rows = two_order_label
+    order_pages = flipkart.split_pdf_custom(pdf_path, "out", rows, top_ratio=0.46, resume=False, incremental=False, label_index="labels.sqlite")
+    first_order = next(iter(order_pages))
+    assert order_pages[SECOND_ORDER].output_path == order_pages[first_order].output_path is not None
+
+    label_index = LabelIndex("labels.sqlite")
+    try:
+        for order_id in (first_order, SECOND_ORDER):
+            rows = label_index.lookup(order_id)
+            assert [row["output_path"] for row in rows] == [order_pages[order_id].output_path]
+            assert rows[0]["first_page"] == 0
+        assert label_index.by_sku("SKU-EXTRA")[0]["order_id"] == SECOND_ORDER
+    finally:
+        label_index.close()
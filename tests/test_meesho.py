@@ -0,0 +1,59 @@
+import fitz  # PyMuPDF
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_labels
+from meesho_final_integrate import meesho
+
+NO_AWB_ORDER = "123400000061"  # purchase order whose manifest rows lose their AWB
+
+
+@pytest.fixture
+def labels(tmp_path, monkeypatch):
+    """Synthetic Meesho PDF and manifest where NO_AWB_ORDER has no AWB; returns (pdf, manifest rows, its page)."""
+    monkeypatch.chdir(tmp_path)  # run logs go to ./logs
+    make_labels("meesho", "labels.pdf", "labels.xlsx", 90, image_every=0)
+    manifest = pd.read_excel("labels.xlsx", dtype=str)
+    manifest.loc[manifest["Sub Order No."].str.startswith(NO_AWB_ORDER), "AWB"] = None
+    manifest.to_excel("labels.xlsx", index=False)
+    with fitz.open("labels.pdf") as doc:
+        page = next(page_num for page_num in range(len(doc)) if NO_AWB_ORDER in doc[page_num].get_text())
+    return "labels.pdf", meesho.load_manifest("labels.xlsx"), page
+
+
+def split(labels, output_folder, **options):
+    pdf_path, rows, _ = labels
+    order_pages = meesho.split_pdf_custom(pdf_path, output_folder, rows, top_ratio=0.345, resume=False, incremental=False, label_index=None, **options)
+    return {key: (record.order_id, list(record.pages), [(item.sku, str(item.qty), item.sub_order_id) for item in record.items], record.output_path.split("/")[-1]) for key, record in order_pages.items()}
+
+
+def test_order_without_awb_joins_previous_order(labels):
+    _, _, page = labels
+    order_pages = split(labels, "serial")
+    previous = next(record for record in order_pages.values() if page in record[1])
+    assert f"{NO_AWB_ORDER}_1" in [item[2] for item in previous[2]]
+
+
+def test_sharded_split_matches_serial(labels):
+    _, _, page = labels
+    serial = split(labels, "serial")
+    # a shard starting on the page of the order without an AWB
+    assert split(labels, "sharded", workers=2, shard_size=page) == serial
+    assert split(labels, "sharded_more", workers=3, shard_size=page // 2 + 1) == serial
+
+
+def test_items_read_from_label_keep_sub_order_id(labels):
+    order_pages = split(labels, "serial")
+    # every 20th synthetic order is left out of the manifest, so its items come off the label
+    assert [item[2] for item in order_pages["VL000000000020"][2]] == [f"123400000020_{j}" for j in (1, 2, 3)]
+
+
+def test_crashed_split_keeps_its_log(labels, monkeypatch):
+    def crash(*args, **entry):
+        raise RuntimeError("crash")
+
+    monkeypatch.setattr(meesho, "save_order_pdf", crash)
+    with pytest.raises(RuntimeError):
+        split(labels, "crashed")
+    with open("logs/logfile_meesho.jsonl", encoding="utf-8") as log:
+        assert '"page": 0' in log.readline()
@@ -0,0 +1,42 @@
+import fitz  # PyMuPDF
+import pytest
+
+from surya.records import OrderRecord
+from surya.sink import ZipSink, TarSink, OutputReader, ARCHIVE_SEPARATOR
+from surya.writer import OrderPdfWriter
+
+
+def blank_doc(pages):
+    doc = fitz.open()
+    for _ in range(pages):
+        doc.new_page()
+    return doc
+
+
+@pytest.mark.parametrize("sink_class", [ZipSink, TarSink])
+def test_archive_refuses_duplicate_members(tmp_path, sink_class):
+    sink = sink_class(str(tmp_path / f"orders{sink_class.extension}"))
+    sink.write("Order_1.pdf", blank_doc(1))
+    with pytest.raises(ValueError):
+        sink.write("Order_1.pdf", blank_doc(2))
+    sink.close()
+
+
+@pytest.mark.parametrize("sink_class", [ZipSink, TarSink])
+def test_writer_adds_each_order_once_to_an_archive(tmp_path, sink_class):
+    """An order that gains pages after it was emitted, as Amazon orders can, ends up in the archive once, complete."""
+    path = str(tmp_path / f"orders{sink_class.extension}")
+    sink = sink_class(path)
+    source = blank_doc(4)
+    record = OrderRecord("1", pages=[0, 1])
+    writer = OrderPdfWriter(source, str(tmp_path), sink=sink)
+    writer.emit(record)
+    record.pages.append(3)
+    writer.finish({"1": record})
+    sink.close()
+
+    assert record.output_path == f"{path}{ARCHIVE_SEPARATOR}Order_1.pdf"
+    assert [name for name, _ in sink_class._members(path)] == ["Order_1.pdf", "index.csv"]
+    reader = OutputReader()
+    assert len(reader.open(record.output_path)) == 3
+    reader.close()